@@ -1,64 +1,61 @@
 # app_gradio.py  ← save in project root
 
+import os
 import gradio as gr
 from pathlib import Path
-from extractor import extract_text_from_file
-from parser import parse_document
-from matcher import get_match_report
-from tailor_llm import tailor_summary_and_skills
+from incremental import IncrementalPipeline
+from speculation import speculator
+from profiling import profiled  # PROFILE_MEMORY=out.json to enable
 
 OUTPUT_DIR = Path("output")
 OUTPUT_DIR.mkdir(exist_ok=True)
 
 
 # Step 1: Analyze
-def analyze_resume(resume_file, jd_file):
+@profiled("app.analyze", dump=True)
+def analyze_resume(resume_file, jd_file, pipeline):
     if not resume_file or not jd_file:
-        return "Upload both files", "", [], None
+        return "Upload both files", "", [], pipeline
 
-    resume_text = extract_text_from_file(resume_file.name)
-    jd_text = extract_text_from_file(jd_file.name)
+    # The session's pipeline only redoes what changed since the last analysis:
+    # unchanged files are not re-extracted, unchanged sections not re-parsed
+    pipeline = pipeline or IncrementalPipeline()
+    pipeline.update_resume_file(resume_file.name)
+    pipeline.update_jd_file(jd_file.name)
 
-    parsed_resume = parse_document(resume_text, "resume")
-    parsed_jd = parse_document(jd_text, "jd")
+    parsed_resume = pipeline.parsed_resume()
+    parsed_jd = pipeline.parsed_jd()
 
-    report = get_match_report(parsed_resume, parsed_jd, resume_text, jd_text)
+    report = pipeline.match_report()
     score = report["match_score"]
     missing = report["missing_skills"][:12]
 
-    # Smart suggestions
-    suggestions = []
-    lower_text = resume_text.lower()
-    if any(k in lower_text for k in ["image", "opencv", "vision", "cnn", "yolo"]):
-        suggestions.extend(["computer vision", "image processing", "large-scale imagery"])
-    if "python" in lower_text:
-        suggestions.append("python ml pipelines")
-    if any(k in lower_text for k in ["pytorch", "tensorflow", "keras"]):
-        suggestions.extend(["deep learning", "deep learning frameworks"])
+    # Smart suggestions (rules from resources/suggestion_rules.json)
+    suggestions = pipeline.suggestions()
 
-    suggestions = list(dict.fromkeys([s.title() for s in suggestions]))
+    # Start Step 2 in the background with the most likely selection
+    speculator.speculate(parsed_resume, parsed_jd, suggestions)
 
     return (
         f"**Current Match: {score}%**",
         f"Missing key skills: **{', '.join(missing) if missing else 'Great fit!'}**",
         gr.CheckboxGroup(choices=suggestions, label="I have experience with these (honestly):", value=[]),
-        (parsed_resume, parsed_jd)
+        pipeline
     )
 
 
 # Step 2: Generate Summary + Skills
-def generate_tailored(checkboxes, state):
-    if not state:
+@profiled("app.tailor", dump=True)
+def generate_tailored(checkboxes, pipeline):
+    if not pipeline:
         return "Please click 'Analyze My Match' first", None
 
-    parsed_resume, parsed_jd = state
+    parsed_resume, parsed_jd = pipeline.parsed_resume(), pipeline.parsed_jd()
     approved = checkboxes or []
 
-    result = tailor_summary_and_skills(
-        parsed_resume=parsed_resume,
-        parsed_jd=parsed_jd,
-        approved_keywords=approved
-    )
+    # Cached per keyword selection, else the speculative run, else tailor now
+    result = pipeline.tailored(approved)
+    projected = pipeline.projected_match()
 
     if "error" in result:
         return f"Error: {result['error']}", None
@@ -75,7 +72,7 @@ def generate_tailored(checkboxes, state):
 **SKILLS** ({original_count} → {final_count} | +{added_count})
 {' • '.join(result['final_skills_list'])}
 
-**Estimated new match:** 85–95%+
+**Estimated new match:** {projected['match_score']}%
 """
 
     txt_path = OUTPUT_DIR / "TAILORED_SUMMARY_AND_SKILLS.txt"
@@ -118,17 +115,20 @@ with gr.Blocks(title="Resume Tailor AI — Honest & Powerful", theme=gr.themes.S
 
     analyze_btn.click(
         analyze_resume,
-        inputs=[resume_in, jd_in],
-        outputs=[score_out, missing_out, checkbox_group, state]
+        inputs=[resume_in, jd_in, state],
+        outputs=[score_out, missing_out, checkbox_group, state],
+        api_name="analyze"
     )
 
     tailor_btn.click(
         generate_tailored,
         inputs=[checkbox_group, state],
-        outputs=[preview_out, download_out]
+        outputs=[preview_out, download_out],
+        api_name="tailor"
     )
 
     gr.Markdown("Made with Groq 70B • 100% Ethical • Zero lies")
 
 if __name__ == "__main__":
-    demo.launch(share=True)
\ No newline at end of file
+    # GRADIO_SHARE=0 keeps it local (e.g. for load tests); port via GRADIO_SERVER_PORT
+    demo.launch(share=os.getenv("GRADIO_SHARE", "1") == "1")
\ No newline at end of file
@@ -7,6 +7,7 @@ from pathlib import Path
 import re
 import logging
 import pdfplumber
+from profiling import profile_stage
 
 try:
     import docx2txt
@@ -28,14 +29,15 @@ def normalize_text_block(text: str) -> str:
     - Remove multiple blank lines
     - Fix spacing
     """
-    text = text.replace("\r", "")
-    # Remove trailing spaces on each line
-    text = "\n".join(line.rstrip() for line in text.split("\n"))
-    # Remove multiple blank lines
-    text = re.sub(r"\n{3,}", "\n\n", text)
-    # Remove extra spaces
-    text = re.sub(r"[ \t]+", " ", text)
-    return text.strip()
+    with profile_stage("normalize"):
+        text = text.replace("\r", "")
+        # Remove trailing spaces on each line
+        text = "\n".join(line.rstrip() for line in text.split("\n"))
+        # Remove multiple blank lines
+        text = re.sub(r"\n{3,}", "\n\n", text)
+        # Remove extra spaces
+        text = re.sub(r"[ \t]+", " ", text)
+        return text.strip()
 
 
 def normalize_whitespace(text: str) -> str:
@@ -50,7 +52,8 @@ def extract_text_from_docx(path: str) -> str:
     if docx2txt is None:
         raise RuntimeError("docx2txt not installed. Run: pip install docx2txt")
     try:
-        text = docx2txt.process(path) or ""
+        with profile_stage("extract.docx"):
+            text = docx2txt.process(path) or ""
         return normalize_text_block(text)
     except Exception as e:
         logger.error("DOCX extraction failed (%s): %s", path, e)
@@ -63,7 +66,7 @@ def extract_text_from_docx(path: str) -> str:
 def extract_text_from_pdf(path: str) -> str:
     try:
         text = ""
-        with pdfplumber.open(path) as pdf:
+        with profile_stage("extract.pdf"), pdfplumber.open(path) as pdf:
             for page in pdf.pages:
                 page_text = page.extract_text(x_tolerance=2, y_tolerance=2)
                 if page_text:
@@ -79,7 +82,9 @@ def extract_text_from_pdf(path: str) -> str:
 # -------------------------
 def extract_text_from_txt(path: str) -> str:
     try:
-        return normalize_text_block(Path(path).read_text(encoding="utf-8", errors="ignore"))
+        with profile_stage("extract.txt"):
+            text = Path(path).read_text(encoding="utf-8", errors="ignore")
+        return normalize_text_block(text)
     except Exception as e:
         logger.error("TXT read failed (%s): %s", path, e)
         return ""
@@ -132,8 +137,14 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("file", help="Path to resume or JD file")
     parser.add_argument("--save", action="store_true", help="Save full extracted text to extracted_output.txt")
+    parser.add_argument("--profile", nargs="?", const="output/memory_profile.json", metavar="JSON",
+                        help="Profile memory per stage (tracemalloc) and write a JSON report")
     args = parser.parse_args()
 
+    if args.profile:
+        import profiling
+        profiling.enable(args.profile)
+
     path = args.file
     print(f"\n📄 Extracting text from: {path}")
 
@@ -155,3 +166,7 @@ if __name__ == "__main__":
         with open(output_file, "w", encoding="utf-8") as f:
             f.write(text)
         print(f"\n💾 Full extracted text saved to {output_file.resolve()}")
+
+    if args.profile:
+        profiling.get_profiler().print_summary()
+        print(f"\n🧠 Memory profile saved to {profiling.dump_if_enabled()}")
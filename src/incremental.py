@@ -0,0 +1,453 @@
+# src/incremental.py
+"""
+Incremental re-matching.
+
+IncrementalPipeline keeps the previous version of every intermediate
+output for one session and recomputes only what an input change actually
+made stale:
+
+    resume_file → resume_text → parsed_resume, suggestions
+    jd_file     → jd_text     → parsed_jd
+    parsed_resume + parsed_jd (+ texts) → match_report
+    match_report + keywords             → projected_match
+    parsed_resume + parsed_jd + keywords → tailored
+
+- Files: re-uploading identical bytes is a no-op; a changed file that
+  extracts to the same text stops there.
+- Parsing: the first version is parsed as parse_document would (one call,
+  or map-reduce chunks for long texts). After that the text is diffed
+  against the previous version section by section (parser.split_units):
+  only new or edited sections go to the LLM, the removed sections'
+  values are dropped from the previous parse and the new ones merged in
+  with merge_parsed_chunks. Large rewrites fall back to a full parse.
+  JDs go through the near-duplicate cache first.
+- Matching: the match report is updated by applying the skill-set delta
+  (matcher.apply_skill_delta). A full match_skills run only happens when
+  either side has too few skills, i.e. when KeyBERT fallback is involved.
+- Tailoring: results are cached per keyword set until a parsed document
+  changes, so toggling back to an earlier selection costs nothing.
+
+Each node remembers the versions of its parents when it was computed; a
+recomputation that yields the same value does not bump the version, so
+unchanged outputs do not make their dependents stale.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from extractor import extract_text_from_file
+from parser import (
+    CHUNK_CHARS, CHUNK_WORKERS, MAX_PROMPT_CHARS, jd_cache, merge_and_clean, merge_parsed_chunks,
+    parse_failed, parse_rules, parse_with_groq, parse_with_groq_chunked, split_units
+)
+from matcher import apply_skill_delta, match_skills, normalize_skills
+from suggestions import suggest_skills
+from speculation import _keywords_key, speculator
+from tailor_llm import tailor_summary_and_skills
+from profiling import profile_stage
+
+logger = logging.getLogger("incremental")
+logging.basicConfig(level=logging.INFO)
+
+SECTION_CACHE_SIZE = 256      # individually parsed sections kept per document
+FULL_REPARSE_RATIO = 0.5      # re-parse everything when more of the text than this changed
+TAILOR_CACHE_SIZE = 16        # keyword selections kept per document pair
+MIN_SKILLS_FOR_DELTA = 3      # below this match_skills falls back to KeyBERT
+
+# node -> parents
+GRAPH: Dict[str, List[str]] = {
+    "resume_file": [],
+    "jd_file": [],
+    "keywords": [],
+    "resume_text": ["resume_file"],
+    "jd_text": ["jd_file"],
+    "parsed_resume": ["resume_text"],
+    "parsed_jd": ["jd_text"],
+    "suggestions": ["resume_text"],
+    "match_report": ["parsed_resume", "parsed_jd", "resume_text", "jd_text"],
+    "projected_match": ["match_report", "keywords"],
+    "tailored": ["parsed_resume", "parsed_jd", "keywords"],
+}
+
+
+def _hash(value: Any) -> str:
+    if isinstance(value, bytes):
+        payload = value
+    elif isinstance(value, str):
+        payload = value.encode("utf-8")
+    else:
+        payload = json.dumps(value, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha1(payload).hexdigest()
+
+
+# ========================================
+# 1. DEPENDENCY GRAPH
+# ========================================
+class DependencyGraph:
+    def __init__(self, parents: Dict[str, List[str]] = GRAPH):
+        self.parents = parents
+        self.versions = {node: 0 for node in parents}
+        self._seen: Dict[str, Optional[Dict[str, int]]] = {node: None for node in parents}  # parent versions at compute time
+
+    def children(self, node: str) -> List[str]:
+        return [n for n, ps in self.parents.items() if node in ps]
+
+    def is_stale(self, node: str) -> bool:
+        seen = self._seen[node]
+        if seen is None:
+            return bool(self.parents[node])   # inputs are never stale, outputs until first computed
+        return any(
+            self.versions[p] != seen[p] or self.is_stale(p)
+            for p in self.parents[node]
+        )
+
+    def stale(self) -> List[str]:
+        """Outputs that would be recomputed on next access"""
+        return [node for node in self.parents if self.is_stale(node)]
+
+    def invalidate(self, node: str) -> None:
+        """Force node to be recomputed on next access"""
+        self._seen[node] = None
+
+    def mark_fresh(self, node: str, changed: bool) -> None:
+        """Record that node was (re)computed or set; bump its version only if the value changed"""
+        self._seen[node] = {p: self.versions[p] for p in self.parents[node]}
+        if changed:
+            self.versions[node] += 1
+
+    def downstream(self, node: str) -> List[str]:
+        """Every node that (transitively) depends on node"""
+        out, todo = [], self.children(node)
+        while todo:
+            child = todo.pop(0)
+            if child not in out:
+                out.append(child)
+                todo.extend(self.children(child))
+        return out
+
+
+# ========================================
+# 2. SECTION-LEVEL INCREMENTAL PARSE
+# ========================================
+def _anchor(item: Any) -> str:
+    """Text an extracted value should appear under in the source document"""
+    if isinstance(item, dict):
+        item = next((v for v in item.values() if isinstance(v, str) and len(v.strip()) >= 4), "")
+    return item.strip().lower() if isinstance(item, str) else ""
+
+
+def _drop_contributions(data: Dict[str, Any], removed_text: str, kept_text: str,
+                        known_parts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Remove what the removed sections contributed to a previous parse:
+    - values of removed sections parsed on their own earlier (exact)
+    - values whose text occurs in a removed section but in no kept one
+    Values not traceable to either (e.g. normalized by the LLM) are kept.
+    """
+    removed_text, kept_text = removed_text.lower(), kept_text.lower()
+    known = {_anchor(v) for part in known_parts for value in part.values()
+             for v in (value if isinstance(value, list) else [value])} - {""}
+
+    def owned(item: Any) -> bool:
+        anchor = _anchor(item)
+        if not anchor or anchor in kept_text:
+            return False
+        return anchor in known or anchor in removed_text
+
+    pruned = {}
+    for key, value in data.items():
+        if isinstance(value, list):
+            pruned[key] = [v for v in value if not owned(v)]
+        elif not owned(value):
+            pruned[key] = value
+    return pruned
+
+
+class _DocState:
+    """Previous version of one document (resume or JD)"""
+
+    def __init__(self, doc_type: str):
+        self.doc_type = doc_type
+        self.file_hash: Optional[str] = None
+        self.file_path: Optional[str] = None
+        self.text: str = ""
+        self.parsed: Dict[str, Any] = {}
+        self.base: Optional[Dict[str, Any]] = None   # LLM data for base_sections
+        self.base_sections: List[str] = []
+        self.section_parses: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()   # section hash -> LLM parse
+        self.stats = {"full_parses": 0, "sections_parsed": 0, "sections_reused": 0,
+                      "extractions_skipped": 0, "near_dup_hits": 0}
+        self.incomplete = False   # last parse had failed LLM calls → retry on next update
+
+    def _full_parse(self, text: str) -> Tuple[Dict[str, Any], bool]:
+        # Same LLM calls parse_document(mode="auto") would make
+        self.stats["full_parses"] += 1
+        if len(text) <= MAX_PROMPT_CHARS:
+            data = parse_with_groq(text, self.doc_type)
+            return data, parse_failed(data)
+        data, failed_chunks = parse_with_groq_chunked(text, self.doc_type)
+        return data, failed_chunks > 0
+
+    def _parse_sections(self, sections: List[str]) -> List[Dict[str, Any]]:
+        todo = [s for s in sections if _hash(s) not in self.section_parses]
+        if len(todo) > 1:
+            with ThreadPoolExecutor(max_workers=min(CHUNK_WORKERS, len(todo))) as pool:
+                fresh = dict(zip(todo, pool.map(lambda s: parse_with_groq(s, self.doc_type), todo)))
+        else:
+            fresh = {s: parse_with_groq(s, self.doc_type) for s in todo}
+
+        for section, part in fresh.items():
+            if not parse_failed(part):   # never keep a failed call
+                self.section_parses[_hash(section)] = part
+        while len(self.section_parses) > SECTION_CACHE_SIZE:
+            self.section_parses.popitem(last=False)
+
+        self.stats["sections_parsed"] += len(todo)
+        return [fresh[s] if s in fresh else self.section_parses[_hash(s)] for s in sections]
+
+    def _incremental_parse(self, text: str, sections: List[str]) -> Tuple[Dict[str, Any], bool]:
+        """Re-parse only sections not in the previous version; patch them into the previous parse"""
+        old_keys = {_hash(s) for s in self.base_sections}
+        new_keys = {_hash(s) for s in sections}
+        added = [s for s in sections if _hash(s) not in old_keys]
+        removed = [s for s in self.base_sections if _hash(s) not in new_keys]
+        kept = [s for s in sections if _hash(s) in old_keys]
+        self.stats["sections_reused"] += len(kept)
+        logger.info(f"{self.doc_type}: {len(sections)} sections, {len(added)} new/edited, {len(removed)} gone")
+
+        if not added and not removed:
+            return self.base, False
+        if sum(map(len, added)) > FULL_REPARSE_RATIO * len(text):
+            return self._full_parse(text)
+
+        added_parts = self._parse_sections(added)
+        known_removed = [self.section_parses[_hash(s)] for s in removed if _hash(s) in self.section_parses]
+        pruned = _drop_contributions(self.base, "\n".join(removed), "\n".join(kept), known_removed)
+        failed = any(parse_failed(p) for p in added_parts)
+        # Previous values first (scalars: first non-empty wins), then the new sections
+        return merge_parsed_chunks([pruned] + added_parts), failed
+
+    def parse(self, text: str, file_name: Optional[str] = None) -> Dict[str, Any]:
+        if not text or len(text) < 50:
+            return {"error": "Empty or too short text"}
+
+        sections = split_units(text, CHUNK_CHARS)
+        use_jd_cache = self.doc_type == "jd" and jd_cache is not None
+        if use_jd_cache:
+            cached = jd_cache.lookup(text)
+            if cached is not None:
+                self.stats["near_dup_hits"] += 1
+                self.base, self.base_sections, self.incomplete = cached, sections, False
+                return cached
+
+        with profile_stage("parse.incremental"):
+            if self.base is None:
+                data, failed = self._full_parse(text)
+            else:
+                data, failed = self._incremental_parse(text, sections)
+            result = merge_and_clean(parse_rules(text, self.doc_type, file_name), data)
+
+        # A failed update keeps the last good version as the diff base, so the
+        # retry re-parses the same sections
+        self.incomplete = failed
+        if not failed:
+            self.base, self.base_sections = data, sections
+            if use_jd_cache:
+                jd_cache.add(text, result)
+        return result
+
+
+# ========================================
+# 3. PIPELINE
+# ========================================
+class IncrementalPipeline:
+    def __init__(self):
+        self.graph = DependencyGraph()
+        self.resume = _DocState("resume")
+        self.jd = _DocState("jd")
+        self.keywords: List[str] = []
+        self._suggestions: List[str] = []
+        self._report: Optional[Dict[str, Any]] = None
+        self._report_sets = (set(), set())   # normalized parser skill sets behind _report
+        self._projected: Optional[Dict[str, Any]] = None
+        self._tailored: "OrderedDict[FrozenSet[str], Dict[str, Any]]" = OrderedDict()
+        self._tailored_docs = None   # parsed_resume / parsed_jd versions behind _tailored
+        self.stats = {"match_delta": 0, "match_full": 0, "tailor_hits": 0, "tailor_misses": 0}
+
+    def _doc(self, doc_type: str) -> _DocState:
+        return self.resume if doc_type == "resume" else self.jd
+
+    # ---------- inputs ----------
+    def update_file(self, doc_type: str, path: str) -> bool:
+        """Point the document at a (possibly re-uploaded) file. Returns True if its bytes changed."""
+        doc = self._doc(doc_type)
+        with open(path, "rb") as f:
+            file_hash = _hash(f.read())
+        doc.file_path = path   # uploads land at a new temp path even when unchanged
+        if file_hash == doc.file_hash:
+            doc.stats["extractions_skipped"] += 1
+            self._retry_failed(doc_type)
+            return False
+        doc.file_hash = file_hash
+        self.graph.mark_fresh(f"{doc_type}_file", changed=True)
+        return True
+
+    def update_text(self, doc_type: str, text: str) -> bool:
+        """Set the document text directly (no file). Returns True if it changed."""
+        doc = self._doc(doc_type)
+        changed = text != doc.text
+        doc.text = text
+        self.graph.mark_fresh(f"{doc_type}_text", changed)
+        if not changed:
+            self._retry_failed(doc_type)
+        return changed
+
+    def _retry_failed(self, doc_type: str) -> None:
+        # Same input again: still re-parse sections whose LLM call failed last time
+        if self._doc(doc_type).incomplete:
+            self.graph.invalidate(f"parsed_{doc_type}")
+
+    def update_resume_file(self, path: str) -> bool:
+        return self.update_file("resume", path)
+
+    def update_jd_file(self, path: str) -> bool:
+        return self.update_file("jd", path)
+
+    def update_resume(self, text: str) -> bool:
+        return self.update_text("resume", text)
+
+    def update_jd(self, text: str) -> bool:
+        return self.update_text("jd", text)
+
+    def set_keywords(self, keywords: List[str]) -> bool:
+        changed = _keywords_key(keywords) != _keywords_key(self.keywords)
+        self.keywords = list(keywords or [])
+        self.graph.mark_fresh("keywords", changed)
+        return changed
+
+    def stale(self) -> List[str]:
+        return self.graph.stale()
+
+    # ---------- outputs ----------
+    def text(self, doc_type: str) -> str:
+        doc, node = self._doc(doc_type), f"{doc_type}_text"
+        if self.graph.is_stale(node):
+            text = extract_text_from_file(doc.file_path) if doc.file_path else doc.text
+            changed = text != doc.text
+            if not changed:
+                logger.info(f"{doc_type}: new file, same text → downstream kept")
+            doc.text = text
+            self.graph.mark_fresh(node, changed)
+        return doc.text
+
+    def parsed(self, doc_type: str) -> Dict[str, Any]:
+        doc, node = self._doc(doc_type), f"parsed_{doc_type}"
+        if self.graph.is_stale(node):
+            text = self.text(doc_type)
+            parsed = doc.parse(text, os.path.basename(doc.file_path) if doc.file_path else None)
+            changed = parsed != doc.parsed
+            doc.parsed = parsed
+            self.graph.mark_fresh(node, changed)
+        return doc.parsed
+
+    def parsed_resume(self) -> Dict[str, Any]:
+        return self.parsed("resume")
+
+    def parsed_jd(self) -> Dict[str, Any]:
+        return self.parsed("jd")
+
+    def suggestions(self) -> List[str]:
+        if self.graph.is_stale("suggestions"):
+            suggestions = suggest_skills(self.text("resume"))
+            changed = suggestions != self._suggestions
+            self._suggestions = suggestions
+            self.graph.mark_fresh("suggestions", changed)
+        return self._suggestions
+
+    def match_report(self) -> Dict[str, Any]:
+        if not self.graph.is_stale("match_report"):
+            return self._report
+
+        parsed_resume, parsed_jd = self.parsed_resume(), self.parsed_jd()
+        resume_set = normalize_skills(parsed_resume.get("skills", []))
+        jd_set = normalize_skills(parsed_jd.get("skills", []))
+        old_resume, old_jd = self._report_sets
+
+        delta_ok = self._report is not None and min(
+            len(resume_set), len(jd_set), len(old_resume), len(old_jd)
+        ) >= MIN_SKILLS_FOR_DELTA
+
+        if delta_ok:
+            # Same result as match_skills: no KeyBERT on either side, before or after
+            report = apply_skill_delta(
+                self._report, resume_set,
+                resume_added=resume_set - old_resume, resume_removed=old_resume - resume_set,
+                jd_added=jd_set - old_jd, jd_removed=old_jd - jd_set
+            )
+            self.stats["match_delta"] += 1
+        else:
+            report = match_skills(parsed_resume.get("skills", []), parsed_jd.get("skills", []),
+                                  self.text("resume"), self.text("jd"))
+            self.stats["match_full"] += 1
+
+        changed = report != self._report
+        self._report, self._report_sets = report, (resume_set, jd_set)
+        self.graph.mark_fresh("match_report", changed)
+        return report
+
+    def projected_match(self) -> Dict[str, Any]:
+        """Match report as if the approved keywords were on the resume"""
+        if self.graph.is_stale("projected_match"):
+            report = self.match_report()
+            added = {k.strip().lower() for k in self.keywords if k.strip()}
+            projected = apply_skill_delta(report, set(report.get("matched_skills", [])) | added, resume_added=added)
+            changed = projected != self._projected
+            self._projected = projected
+            self.graph.mark_fresh("projected_match", changed)
+        return self._projected
+
+    def tailored(self, keywords: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Tailoring for the keyword set, cached per selection until a parsed document changes"""
+        if keywords is not None:
+            self.set_keywords(keywords)
+        parsed_resume, parsed_jd = self.parsed_resume(), self.parsed_jd()
+
+        docs = (self.graph.versions["parsed_resume"], self.graph.versions["parsed_jd"])
+        if docs != self._tailored_docs:
+            self._tailored.clear()   # keyword-only changes keep the cache
+            self._tailored_docs = docs
+
+        key = _keywords_key(self.keywords)
+        result = self._tailored.get(key)
+        if result is not None:
+            self.stats["tailor_hits"] += 1
+            self._tailored.move_to_end(key)
+        else:
+            self.stats["tailor_misses"] += 1
+            result = speculator.take(parsed_resume, parsed_jd, self.keywords)
+            if result is None:
+                result = tailor_summary_and_skills(
+                    parsed_resume=parsed_resume,
+                    parsed_jd=parsed_jd,
+                    approved_keywords=self.keywords
+                )
+            if "error" not in result:
+                self._tailored[key] = result
+                while len(self._tailored) > TAILOR_CACHE_SIZE:
+                    self._tailored.popitem(last=False)
+
+        self.graph.mark_fresh("tailored", changed=True)
+        return result
+
+    def report_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "resume": dict(self.resume.stats),
+            "jd": dict(self.jd.stats),
+            "stale": self.stale(),
+        }
@@ -0,0 +1,198 @@
+# src/llm.py
+"""
+Shared LLM provider client and call layer.
+
+One Groq client backed by one pooled keep-alive httpx connection pool,
+shared by parser, tailor_llm and the HTTP service, instead of every module
+opening its own connections.
+
+chat_completion() adds tail-latency control on top of it:
+- a per-call deadline covering every attempt
+- retries with exponential backoff + full jitter on retryable errors
+  (timeouts, connection errors, 429, 5xx)
+- optional hedging: if the first attempt is still running after the
+  observed p95 latency, a second identical request is sent and whichever
+  answers first wins
+"""
+
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional
+
+import httpx
+from groq import APIConnectionError, APITimeoutError, Groq, InternalServerError, RateLimitError
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger("llm")
+logging.basicConfig(level=logging.INFO)
+
+# Connection pool sizing (override via env when running behind the service)
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "64"))
+LLM_MAX_KEEPALIVE = int(os.getenv("LLM_MAX_KEEPALIVE", "32"))
+LLM_KEEPALIVE_EXPIRY_S = float(os.getenv("LLM_KEEPALIVE_EXPIRY_S", "60"))
+
+# Call policy
+LLM_DEADLINE_S = float(os.getenv("LLM_DEADLINE_S", "30"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_BACKOFF_BASE_S = float(os.getenv("LLM_BACKOFF_BASE_S", "0.5"))
+LLM_BACKOFF_CAP_S = float(os.getenv("LLM_BACKOFF_CAP_S", "8"))
+LLM_HEDGE = os.getenv("LLM_HEDGE", "0") == "1"
+HEDGE_MIN_SAMPLES = 20          # no hedging until p95 is meaningful
+LATENCY_WINDOW = 500            # recent successful calls used for p95
+
+http_client = httpx.Client(
+    limits=httpx.Limits(
+        max_connections=LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=LLM_MAX_KEEPALIVE,
+        keepalive_expiry=LLM_KEEPALIVE_EXPIRY_S
+    ),
+    timeout=httpx.Timeout(60.0, connect=5.0)
+)
+
+# Retries are handled by chat_completion, not by the SDK
+client = Groq(http_client=http_client, max_retries=0)  # Make sure GROQ_API_KEY is in your environment!
+
+RETRYABLE_ERRORS = (APITimeoutError, APIConnectionError, RateLimitError, InternalServerError)
+
+
+class LLMDeadlineExceeded(TimeoutError):
+    pass
+
+
+# ========================================
+# METRICS
+# ========================================
+_latencies: deque = deque(maxlen=LATENCY_WINDOW)
+_metrics = {"calls": 0, "attempts": 0, "retries": 0, "failures": 0, "deadline_exceeded": 0,
+            "hedges_issued": 0, "hedges_won": 0}
+_metrics_lock = threading.Lock()
+
+
+def _count(key: str, n: int = 1) -> None:
+    with _metrics_lock:
+        _metrics[key] += n
+
+
+def p95_latency() -> Optional[float]:
+    with _metrics_lock:
+        samples = sorted(_latencies)
+    if len(samples) < HEDGE_MIN_SAMPLES:
+        return None
+    return samples[int(0.95 * (len(samples) - 1))]
+
+
+def metrics() -> Dict[str, Any]:
+    with _metrics_lock:
+        snapshot = dict(_metrics)
+    p95 = p95_latency()
+    snapshot["p95_latency_s"] = round(p95, 3) if p95 is not None else None
+    return snapshot
+
+
+# ========================================
+# CALL LAYER
+# ========================================
+_hedge_pool = ThreadPoolExecutor(max_workers=LLM_MAX_CONNECTIONS, thread_name_prefix="llm-hedge")
+
+
+def _attempt(messages: List[Dict[str, str]], model: str, temperature: float, max_tokens: int, timeout: float) -> str:
+    _count("attempts")
+    t0 = time.perf_counter()
+    response = client.with_options(timeout=timeout).chat.completions.create(
+        model=model,
+        messages=messages,
+        temperature=temperature,
+        max_tokens=max_tokens
+    )
+    with _metrics_lock:
+        _latencies.append(time.perf_counter() - t0)
+    return response.choices[0].message.content.strip()
+
+
+def _hedged_attempt(messages, model, temperature, max_tokens, timeout: float, hedge_after: float) -> str:
+    """Primary request; a second one after hedge_after seconds; first success wins"""
+    primary = _hedge_pool.submit(_attempt, messages, model, temperature, max_tokens, timeout)
+    done, _ = wait([primary], timeout=hedge_after)
+    if done:
+        return primary.result()
+
+    _count("hedges_issued")
+    hedge = _hedge_pool.submit(_attempt, messages, model, temperature, max_tokens, max(timeout - hedge_after, 0.1))
+    pending = {primary, hedge}
+    error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                result = future.result()
+            except Exception as e:
+                error = e
+                continue
+            if future is hedge:
+                _count("hedges_won")
+            return result   # the loser keeps running in the background and is ignored
+    raise error
+
+
+def _backoff(attempt: int, error: Exception) -> float:
+    """Full jitter; honours Retry-After on 429 when the provider sends one"""
+    delay = random.uniform(0, min(LLM_BACKOFF_CAP_S, LLM_BACKOFF_BASE_S * 2 ** attempt))
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    try:
+        return max(delay, float(retry_after)) if retry_after else delay
+    except ValueError:
+        return delay
+
+
+def chat_completion(
+    prompt: str,
+    model: str,
+    temperature: float = 0.1,
+    max_tokens: int = 1024,
+    deadline_s: float = LLM_DEADLINE_S,
+    max_retries: int = LLM_MAX_RETRIES,
+    hedge: Optional[bool] = None
+) -> str:
+    """Single-user-message completion with deadline, jittered retries and optional hedging"""
+    _count("calls")
+    messages = [{"role": "user", "content": prompt}]
+    hedge = LLM_HEDGE if hedge is None else hedge
+    deadline = time.monotonic() + deadline_s
+
+    for attempt in range(max_retries + 1):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            hedge_after = p95_latency() if hedge else None
+            if hedge_after is not None and hedge_after < remaining:
+                return _hedged_attempt(messages, model, temperature, max_tokens, remaining, hedge_after)
+            return _attempt(messages, model, temperature, max_tokens, remaining)
+        except RETRYABLE_ERRORS as e:
+            if attempt == max_retries:
+                _count("failures")
+                raise
+            delay = _backoff(attempt, e)
+            if time.monotonic() + delay >= deadline:
+                break
+            _count("retries")
+            logger.warning(f"LLM attempt {attempt + 1} failed ({type(e).__name__}), retrying in {delay:.2f}s")
+            time.sleep(delay)
+        except Exception:
+            _count("failures")
+            raise
+
+    _count("deadline_exceeded")
+    raise LLMDeadlineExceeded(f"LLM call exceeded {deadline_s:.0f}s deadline")
+
+
+def close() -> None:
+    http_client.close()
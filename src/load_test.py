@@ -0,0 +1,404 @@
+# src/load_test.py
+"""
+Load-test harness for app_gradio.
+
+Replays sessions (upload resume + JD → analyze → select keywords → tailor)
+against a locally running app at a target arrival rate, with the LLM
+replaced by a local stub server, and reports throughput, p50/p95/p99 latency
+per step, error rates and the saturation point.
+
+    # everything in one go: stub LLM + local app + rate ramp
+    python src/load_test.py run --launch-app --rates 0.5 1 2 4 8 --duration 60
+
+    # or against an app you started yourself with the stub backend
+    python src/load_test.py stub-llm --port 8765 &
+    GROQ_BASE_URL=http://127.0.0.1:8765 GROQ_API_KEY=stub GRADIO_SHARE=0 python src/app_gradio.py
+    python src/load_test.py run --url http://127.0.0.1:7860 --rates 1 2 4
+
+Sessions are synthetic by default; --sessions takes a JSONL file of recorded
+ones: {"resume": path, "jd": path, "keywords": [...], "think_time_s": 2.0}
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger("load_test")
+logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+
+STEPS = ["connect", "analyze", "tailor", "session"]
+
+
+# ========================================
+# 1. STUB LLM BACKEND (OpenAI-compatible, as used by the Groq SDK)
+# ========================================
+_SKILL_POOL = ["Python", "PyTorch", "TensorFlow", "SQL", "Docker", "AWS", "OpenCV", "GIS",
+               "Remote Sensing", "Machine Learning", "Kubernetes", "Pandas", "Spark", "GDAL"]
+
+
+def _stub_content(prompt: str, rng: random.Random) -> str:
+    if "ATS parser" in prompt and "RESUME" in prompt:
+        return json.dumps({
+            "name": "Test Candidate", "email": "test@example.com", "phone": "+1 555 0100",
+            "skills": rng.sample(_SKILL_POOL, 6),
+            "experience": ["Built computer vision models", "Led ML pipelines in Python"],
+            "education": "MS Computer Science"
+        })
+    if "ATS parser" in prompt:
+        return json.dumps({
+            "job_title": "Senior Data Scientist", "company": "Example Co", "location": "Remote",
+            "skills": rng.sample(_SKILL_POOL, 8),
+            "responsibilities": ["Build geospatial models", "Process satellite imagery"],
+            "requirements": ["5+ years in Python"], "nice_to_have": ["Docker"]
+        })
+    approved = re.search(r"APPROVED KEYWORDS TO INCLUDE: (.*)", prompt)
+    keywords = [k.strip() for k in approved.group(1).split(",")] if approved else []
+    keywords = [k for k in keywords if k and k != "None"]
+    return json.dumps({
+        "summary": "Senior data scientist with a track record of shipping ML systems.",
+        "skills_to_add": [k.title() for k in keywords],
+        "final_skills_list": [],
+        "justification": "stub"
+    })
+
+
+def make_stub_handler(latency_s: float, jitter: float, error_rate: float):
+    rng = random.Random()
+    sigma = math.sqrt(math.log(1 + jitter ** 2)) if jitter > 0 else 0.0
+
+    class StubLLMHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status: int, payload: Dict[str, Any]) -> None:
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            prompt = "".join(m.get("content", "") for m in request.get("messages", []))
+
+            # Lognormal latency with the requested mean and coefficient of variation
+            delay = latency_s * math.exp(rng.gauss(-sigma ** 2 / 2, sigma)) if sigma else latency_s
+            time.sleep(delay)
+
+            if rng.random() < error_rate:
+                self._send(503, {"error": {"message": "stub overloaded", "type": "server_error"}})
+                return
+
+            self._send(200, {
+                "id": f"stub-{rng.getrandbits(32):08x}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", "stub"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": _stub_content(prompt, rng)},
+                    "finish_reason": "stop"
+                }],
+                "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": 200,
+                          "total_tokens": len(prompt) // 4 + 200}
+            })
+
+    return StubLLMHandler
+
+
+def start_stub_llm(port: int, latency_s: float = 0.8, jitter: float = 0.3, error_rate: float = 0.0) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_stub_handler(latency_s, jitter, error_rate))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="stub-llm", daemon=True).start()
+    logger.info(f"Stub LLM on http://127.0.0.1:{port} (mean latency {latency_s}s, error rate {error_rate})")
+    return server
+
+
+def launch_app(port: int, llm_port: int) -> subprocess.Popen:
+    env = dict(os.environ,
+               GROQ_BASE_URL=f"http://127.0.0.1:{llm_port}",
+               GROQ_API_KEY=os.getenv("GROQ_API_KEY", "stub"),
+               GRADIO_SHARE="0",
+               GRADIO_SERVER_PORT=str(port))
+    app = Path(__file__).parent / "app_gradio.py"
+    proc = subprocess.Popen([sys.executable, str(app)], cwd=str(app.parent), env=env)
+    logger.info(f"Launched app_gradio (pid {proc.pid}) on port {port}")
+    return proc
+
+
+def wait_for_url(url: str, timeout_s: float = 300) -> None:
+    import urllib.request
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=2)
+            return
+        except Exception:
+            time.sleep(1)
+    raise RuntimeError(f"App did not come up at {url} within {timeout_s:.0f}s")
+
+
+# ========================================
+# 2. SESSIONS
+# ========================================
+_RESUME_LINES = [
+    "Built CNN models with PyTorch for satellite imagery",
+    "Developed Python ML pipelines on AWS",
+    "Trained object detection models (YOLO, OpenCV)",
+    "Deployed TensorFlow and Keras models with Docker",
+    "Analysed geospatial data with GDAL and QGIS",
+    "Wrote SQL reports and dashboards",
+]
+_JD_LINES = [
+    "Build geospatial models with Python and GDAL",
+    "Process large-scale satellite imagery",
+    "Experience with deep learning frameworks (PyTorch, TensorFlow)",
+    "Deploy services with Docker and Kubernetes",
+    "Strong SQL and data engineering skills",
+    "Remote sensing background is a plus",
+]
+
+
+def synthetic_sessions(count: int, workdir: Path, seed: int = 7) -> List[Dict[str, Any]]:
+    """count distinct resume/JD pairs as .txt files, with typical keyword picks"""
+    rng = random.Random(seed)
+    sessions = []
+    for i in range(count):
+        resume = workdir / f"resume_{i}.txt"
+        jd = workdir / f"jd_{i}.txt"
+        resume.write_text(
+            f"Candidate {i}\ncandidate{i}@example.com\n\nSUMMARY\nML engineer #{i}\n\nEXPERIENCE\n"
+            + "\n".join(f"- {l}" for l in rng.sample(_RESUME_LINES, 4))
+            + "\n\nSKILLS\n" + ", ".join(rng.sample(_SKILL_POOL, 6)) + "\n",
+            encoding="utf-8"
+        )
+        jd.write_text(
+            f"Senior Data Scientist (req {i})\nExample Co {i}\n\nResponsibilities:\n"
+            + "\n".join(f"- {l}" for l in rng.sample(_JD_LINES, 4))
+            + "\n\nRequirements:\n" + "\n".join(f"- {s}" for s in rng.sample(_SKILL_POOL, 5)) + "\n",
+            encoding="utf-8"
+        )
+        sessions.append({
+            "resume": str(resume),
+            "jd": str(jd),
+            "keywords": "suggested" if rng.random() < 0.7 else rng.sample(["Computer Vision", "Deep Learning"], 1),
+            "think_time_s": rng.uniform(0.5, 3.0)
+        })
+    return sessions
+
+
+def load_sessions(path: str) -> List[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+# ========================================
+# 3. SESSION REPLAY
+# ========================================
+def _choices_from(update: Any) -> List[str]:
+    """Suggested keywords from the CheckboxGroup output of /analyze"""
+    if isinstance(update, dict):
+        return list(update.get("choices") or [])
+    if isinstance(update, list):
+        return [c[0] if isinstance(c, (list, tuple)) else c for c in update]
+    return []
+
+
+def run_session(url: str, session: Dict[str, Any], think: bool) -> Dict[str, Any]:
+    """One user: connect, analyze, pick keywords, tailor. Returns per-step timings/errors."""
+    from gradio_client import Client
+
+    timings: Dict[str, float] = {}
+    error: Optional[str] = None
+    failed_step: Optional[str] = None
+    start = time.perf_counter()
+    step = "connect"
+    try:
+        t0 = time.perf_counter()
+        client = Client(url, verbose=False)
+        timings["connect"] = time.perf_counter() - t0
+
+        step = "analyze"
+        t0 = time.perf_counter()
+        analysis = client.predict(session["resume"], session["jd"], api_name="/analyze")
+        timings["analyze"] = time.perf_counter() - t0
+        if not isinstance(analysis, (list, tuple)) or "Match" not in str(analysis[0]):
+            raise RuntimeError(f"unexpected analyze output: {str(analysis)[:120]}")
+
+        keywords = session.get("keywords", "suggested")
+        if keywords == "suggested":
+            keywords = _choices_from(analysis[2])
+        if think:
+            time.sleep(session.get("think_time_s", 0))
+
+        step = "tailor"
+        t0 = time.perf_counter()
+        tailored = client.predict(keywords, api_name="/tailor")
+        timings["tailor"] = time.perf_counter() - t0
+        preview = tailored[0] if isinstance(tailored, (list, tuple)) else tailored
+        if str(preview).startswith(("Error", "Please click")):
+            raise RuntimeError(str(preview)[:120])
+
+        timings["session"] = time.perf_counter() - start
+    except Exception as e:
+        error, failed_step = f"{type(e).__name__}: {e}", step
+
+    return {"timings": timings, "error": error, "failed_step": failed_step}
+
+
+def _percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    idx = min(len(sorted_values) - 1, max(0, math.ceil(q * len(sorted_values)) - 1))
+    return round(sorted_values[idx], 3)
+
+
+def summarize(results: List[Dict[str, Any]], offered_rate: float, elapsed_s: float) -> Dict[str, Any]:
+    steps = {}
+    for step in STEPS:
+        values = sorted(r["timings"][step] for r in results if step in r["timings"])
+        attempted = sum(1 for r in results if step in r["timings"] or r["failed_step"] == step)
+        errors = sum(1 for r in results if r["failed_step"] == step)
+        steps[step] = {
+            "count": len(values),
+            "errors": errors,
+            "error_rate": round(errors / attempted, 4) if attempted else 0.0,
+            "p50_s": _percentile(values, 0.50),
+            "p95_s": _percentile(values, 0.95),
+            "p99_s": _percentile(values, 0.99),
+        }
+    completed = sum(1 for r in results if r["error"] is None)
+    return {
+        "offered_rate": offered_rate,
+        "sessions": len(results),
+        "completed": completed,
+        "error_rate": round(1 - completed / len(results), 4) if results else 0.0,
+        "throughput_sessions_per_s": round(completed / elapsed_s, 3) if elapsed_s else 0.0,
+        "elapsed_s": round(elapsed_s, 1),
+        "steps": steps,
+        "errors_sample": sorted({r["error"] for r in results if r["error"]})[:5],
+    }
+
+
+def run_stage(url: str, sessions: List[Dict[str, Any]], rate: float, duration_s: float,
+              think: bool, max_concurrency: int, seed: int = 0) -> Dict[str, Any]:
+    """Open-loop Poisson arrivals at `rate` sessions/s for `duration_s` seconds"""
+    rng = random.Random(seed)
+    futures = []
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="session") as pool:
+        next_arrival = start
+        i = 0
+        while next_arrival - start < duration_s:
+            time.sleep(max(0.0, next_arrival - time.perf_counter()))
+            futures.append(pool.submit(run_session, url, sessions[i % len(sessions)], think))
+            i += 1
+            next_arrival += rng.expovariate(rate)
+        results = [f.result() for f in futures]
+    elapsed = time.perf_counter() - start
+    return summarize(results, rate, elapsed)
+
+
+def saturation_point(stages: List[Dict[str, Any]], slo_p95_s: float, max_error_rate: float) -> Optional[float]:
+    """First offered rate where analyze p95 breaks the SLO, errors spike or throughput stops keeping up"""
+    for stage in stages:
+        p95 = stage["steps"]["analyze"]["p95_s"]
+        falling_behind = stage["throughput_sessions_per_s"] < 0.8 * stage["offered_rate"]
+        if (p95 is not None and p95 > slo_p95_s) or stage["error_rate"] > max_error_rate or falling_behind:
+            return stage["offered_rate"]
+    return None
+
+
+# ========================================
+# CLI
+# ========================================
+def main():
+    parser = argparse.ArgumentParser(description="Load-test app_gradio with a stubbed LLM backend")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    stub = sub.add_parser("stub-llm", help="Run only the stub LLM server")
+    stub.add_argument("--port", type=int, default=8765)
+    stub.add_argument("--latency", type=float, default=0.8, help="Mean LLM latency (s)")
+    stub.add_argument("--jitter", type=float, default=0.3, help="Latency coefficient of variation")
+    stub.add_argument("--error-rate", type=float, default=0.0)
+
+    run = sub.add_parser("run", help="Replay sessions at one or more arrival rates")
+    run.add_argument("--url", default="http://127.0.0.1:7860")
+    run.add_argument("--launch-app", action="store_true", help="Start the stub LLM and a local app_gradio")
+    run.add_argument("--llm-port", type=int, default=8765)
+    run.add_argument("--latency", type=float, default=0.8)
+    run.add_argument("--jitter", type=float, default=0.3)
+    run.add_argument("--llm-error-rate", type=float, default=0.0)
+    run.add_argument("--sessions", help="JSONL of recorded sessions (default: synthetic)")
+    run.add_argument("--synthetic", type=int, default=50, help="Number of distinct synthetic sessions")
+    run.add_argument("--rates", type=float, nargs="+", default=[0.5, 1, 2, 4], help="Sessions/s, one stage each")
+    run.add_argument("--duration", type=float, default=60, help="Seconds per stage")
+    run.add_argument("--no-think", action="store_true", help="Skip user think time between steps")
+    run.add_argument("--max-concurrency", type=int, default=256)
+    run.add_argument("--slo-p95", type=float, default=10.0, help="analyze p95 SLO (s) for saturation")
+    run.add_argument("--max-error-rate", type=float, default=0.01)
+    run.add_argument("--out", help="Write the JSON report here")
+    args = parser.parse_args()
+
+    if args.command == "stub-llm":
+        start_stub_llm(args.port, args.latency, args.jitter, args.error_rate)
+        threading.Event().wait()
+        return
+
+    app_proc = None
+    if args.launch_app:
+        start_stub_llm(args.llm_port, args.latency, args.jitter, args.llm_error_rate)
+        port = int(args.url.rsplit(":", 1)[-1].strip("/"))
+        app_proc = launch_app(port, args.llm_port)
+
+    try:
+        wait_for_url(args.url)
+        workdir = Path(tempfile.mkdtemp(prefix="loadtest_"))
+        sessions = load_sessions(args.sessions) if args.sessions else synthetic_sessions(args.synthetic, workdir)
+
+        stages = []
+        for rate in args.rates:
+            logger.info(f"Stage: {rate} sessions/s for {args.duration:.0f}s")
+            stage = run_stage(args.url, sessions, rate, args.duration, not args.no_think, args.max_concurrency)
+            stages.append(stage)
+            a = stage["steps"]["analyze"]
+            logger.info(f"  throughput {stage['throughput_sessions_per_s']}/s, errors {stage['error_rate']:.1%}, "
+                        f"analyze p50/p95/p99 {a['p50_s']}/{a['p95_s']}/{a['p99_s']}s")
+
+        report = {
+            "url": args.url,
+            "llm_stub": {"latency_s": args.latency, "jitter": args.jitter, "error_rate": args.llm_error_rate}
+            if args.launch_app else None,
+            "slo_p95_s": args.slo_p95,
+            "saturation_rate": saturation_point(stages, args.slo_p95, args.max_error_rate),
+            "stages": stages,
+        }
+        print(json.dumps(report, indent=2))
+        if args.out:
+            Path(args.out).write_text(json.dumps(report, indent=2), encoding="utf-8")
+            logger.info(f"Report saved to {args.out}")
+    finally:
+        if app_proc is not None:
+            app_proc.terminate()
+            app_proc.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,21 @@
 # src/matcher.py
+import hashlib
 import logging
+import threading
+from collections import OrderedDict
 from typing import List, Dict, Any
 from extractor import extract_text_from_file
 from parser import parse_document
+from profiling import profile_stage
 
 # Optional: keep KeyBERT as smart fallback only
 try:
+    import numpy as np
     from keybert import KeyBERT
-    kw_model = KeyBERT()
+    from sklearn.feature_extraction.text import CountVectorizer
+    from sklearn.metrics.pairwise import cosine_similarity
+    with profile_stage("keybert.load"):
+        kw_model = KeyBERT()
     KEYBERT_AVAILABLE = True
 except ImportError:
     KEYBERT_AVAILABLE = False
@@ -15,23 +23,152 @@ except ImportError:
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("matcher")
 
+# Same settings the single-document KeyBERT call used
+KEYPHRASE_NGRAM_RANGE = (1, 2)
+MMR_DIVERSITY = 0.5
+
+# Bounded caches shared by every fallback call in this process
+CANDIDATE_CACHE_SIZE = 50_000   # n-gram -> embedding
+RESULT_CACHE_SIZE = 2_048       # (doc hash, top_n) -> keywords
+
+_candidate_cache: "OrderedDict[str, Any]" = OrderedDict()
+_result_cache: "OrderedDict[tuple, List[str]]" = OrderedDict()
+_cache_lock = threading.Lock()   # matching runs on many service threads at once
+
+
+# ========================================
+# KEYBERT FALLBACK (batched + cached)
+# ========================================
+def _doc_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8", errors="ignore")).hexdigest()
+
+
+def _lru_get(cache: OrderedDict, key):
+    with _cache_lock:
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+        return value
+
+
+def _lru_put(cache: OrderedDict, key, value, max_size: int) -> None:
+    with _cache_lock:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > max_size:
+            cache.popitem(last=False)
+
+
+def _candidates(text: str) -> List[str]:
+    """Candidate n-grams for one document (same rules KeyBERT applies)"""
+    try:
+        vectorizer = CountVectorizer(ngram_range=KEYPHRASE_NGRAM_RANGE, stop_words="english")
+        vectorizer.fit([text])
+        return list(vectorizer.get_feature_names_out())
+    except ValueError:
+        # Only stop words / empty vocabulary
+        return []
+
+
+def _embed_candidates(words: List[str]) -> Dict[str, Any]:
+    """Look up candidate embeddings, embedding only the cache misses in one batch"""
+    found = {}
+    missing = []
+    for w in words:
+        vec = _lru_get(_candidate_cache, w)
+        if vec is not None:
+            found[w] = vec
+        else:
+            missing.append(w)
+
+    if missing:
+        vectors = kw_model.model.embed(missing)
+        for w, vec in zip(missing, vectors):
+            found[w] = vec
+            _lru_put(_candidate_cache, w, vec, CANDIDATE_CACHE_SIZE)
+    return found
+
+
+def _mmr(doc_embedding, word_embeddings, words: List[str], top_n: int, diversity: float) -> List[str]:
+    """Maximal Marginal Relevance, as used by KeyBERT(use_mmr=True)"""
+    word_doc_similarity = cosine_similarity(word_embeddings, doc_embedding.reshape(1, -1))
+    word_similarity = cosine_similarity(word_embeddings)
+
+    keywords_idx = [int(np.argmax(word_doc_similarity))]
+    candidates_idx = [i for i in range(len(words)) if i != keywords_idx[0]]
+
+    for _ in range(min(top_n, len(words)) - 1):
+        candidate_similarities = word_doc_similarity[candidates_idx, :]
+        target_similarities = np.max(word_similarity[candidates_idx][:, keywords_idx], axis=1)
+        mmr = (1 - diversity) * candidate_similarities - diversity * target_similarities.reshape(-1, 1)
+        mmr_idx = candidates_idx[int(np.argmax(mmr))]
+        keywords_idx.append(mmr_idx)
+        candidates_idx.remove(mmr_idx)
+
+    return [words[i] for i in keywords_idx]
+
+
+def extract_keywords_batch(texts: List[str], top_n: int = 12) -> List[List[str]]:
+    """
+    Batched KeyBERT fallback.
+    Embeds all uncached documents in one forward pass and all unseen
+    candidate n-grams in another, instead of one full KeyBERT run per text.
+    Results are memoized per document hash.
+    """
+    results: List[List[str]] = [[] for _ in texts]
+    if not KEYBERT_AVAILABLE:
+        return results
+
+    # Collect work for documents we have not seen before
+    pending = {}  # doc hash -> (text, [indices])
+    for i, text in enumerate(texts):
+        if not text:
+            continue
+        key = (_doc_hash(text), top_n)
+        cached = _lru_get(_result_cache, key)
+        if cached is not None:
+            results[i] = list(cached)
+        elif key in pending:
+            pending[key][1].append(i)
+        else:
+            pending[key] = (text, [i])
+
+    if not pending:
+        return results
+
+    try:
+        keys = list(pending)
+        docs = [pending[k][0] for k in keys]
+        doc_candidates = [_candidates(d) for d in docs]
+
+        # One batched pass for documents, one for all new candidates
+        doc_embeddings = kw_model.model.embed(docs)
+        all_words = list(dict.fromkeys(w for words in doc_candidates for w in words))
+        word_vectors = _embed_candidates(all_words)
+
+        for key, doc_embedding, words in zip(keys, doc_embeddings, doc_candidates):
+            keywords = []
+            if words:
+                word_embeddings = np.vstack([word_vectors[w] for w in words])
+                keywords = [w.lower() for w in _mmr(doc_embedding, word_embeddings, words, top_n, MMR_DIVERSITY)]
+            _lru_put(_result_cache, key, keywords, RESULT_CACHE_SIZE)
+            for i in pending[key][1]:
+                results[i] = list(keywords)
+    except Exception as e:
+        logger.error(f"KeyBERT batch failed: {e}")
+
+    return results
+
 
 def extract_keywords_fallback(text: str, top_n: int = 12) -> List[str]:
     """Fallback using KeyBERT only if installed"""
     if not KEYBERT_AVAILABLE or not text:
         return []
-    try:
-        keywords = kw_model.extract_keywords(
-            text,
-            keyphrase_ngram_range=(1, 2),
-            stop_words="english",
-            top_n=top_n,
-            use_mmr=True,
-            diversity=0.5
-        )
-        return [kw[0].lower() for kw in keywords]
-    except:
-        return []
+    return extract_keywords_batch([text], top_n=top_n)[0]
+
+
+def normalize_skills(skill_list) -> set:
+    return {str(s).strip().lower() for s in skill_list if s and str(s).strip()}
 
 
 def match_skills(
@@ -45,20 +182,28 @@ def match_skills(
     Uses parser skills first → falls back to KeyBERT only if needed.
     """
     # Clean and normalize
-    def clean(skill_list):
-        return {str(s).strip().lower() for s in skill_list if s and str(s).strip()}
+    clean = normalize_skills
 
     resume_set = clean(resume_skills)
     jd_set = clean(jd_skills)
 
     # Fallback: if parser gave us almost nothing, use KeyBERT
-    if len(resume_set) < 3 and resume_text:
+    # (both documents go through a single batched call)
+    fallback_resume = len(resume_set) < 3 and bool(resume_text)
+    fallback_jd = len(jd_set) < 3 and bool(jd_text)
+    if fallback_resume:
         logger.info("Parser gave few resume skills → using KeyBERT fallback")
-        resume_set.update(clean(extract_keywords_fallback(resume_text)))
-
-    if len(jd_set) < 3 and jd_text:
+    if fallback_jd:
         logger.info("Parser gave few JD skills → using KeyBERT fallback")
-        jd_set.update(clean(extract_keywords_fallback(jd_text)))
+
+    if fallback_resume or fallback_jd:
+        with profile_stage("match.keybert"):
+            resume_kw, jd_kw = extract_keywords_batch([
+                resume_text if fallback_resume else "",
+                jd_text if fallback_jd else ""
+            ])
+        resume_set.update(clean(resume_kw))
+        jd_set.update(clean(jd_kw))
 
     if not jd_set:
         return {
@@ -86,6 +231,58 @@ def match_skills(
     }
 
 
+def apply_skill_delta(
+    report: Dict[str, Any],
+    resume_set: set,
+    resume_added: set = frozenset(),
+    resume_removed: set = frozenset(),
+    jd_added: set = frozenset(),
+    jd_removed: set = frozenset()
+) -> Dict[str, Any]:
+    """
+    Update a match report from skill-set deltas instead of recomputing it.
+    resume_set is the (normalized) resume skill set AFTER the change.
+    Cost is O(delta + report size), no KeyBERT.
+    """
+    matched = set(report.get("matched_skills", []))
+    missing = set(report.get("missing_skills", []))
+
+    for s in jd_removed:
+        matched.discard(s)
+        missing.discard(s)
+    for s in jd_added:
+        (matched if s in resume_set else missing).add(s)
+    for s in resume_added:
+        if s in missing:
+            missing.discard(s)
+            matched.add(s)
+    for s in resume_removed:
+        if s in matched:
+            matched.discard(s)
+            missing.add(s)
+
+    total = len(matched) + len(missing)
+    if not total:
+        return {
+            "match_score": 0.0,
+            "matched_skills": [],
+            "missing_skills": [],
+            "total_required": 0,
+            "message": "No skills detected in Job Description"
+        }
+
+    match_score = round((len(matched) / total) * 100, 1)
+    logger.info(f"Skill Match (incremental): {len(matched)}/{total} → {match_score}%")
+    return {
+        "match_score": match_score,
+        "matched_skills": sorted(matched),
+        "missing_skills": sorted(missing),
+        "total_required": total,
+        "matched_count": len(matched),
+        "source": report.get("source", "parser_only")
+    }
+
+
 # High-level function used by Gradio / main pipeline
 def get_match_report(
     parsed_resume: Dict[str, Any],
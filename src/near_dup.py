@@ -0,0 +1,350 @@
+# src/near_dup.py
+"""
+Near-duplicate JD detection (MinHash + LSH) to skip redundant parsing.
+
+Job boards repost the same JD with trivial edits (dates, location, recruiter
+signature). Each parsed JD is indexed by a MinHash signature of its
+normalized word shingles; LSH banding keeps lookups sub-linear, so queries
+stay fast with hundreds of thousands of stored JDs.
+
+On a hit above the similarity threshold the cached parse is reused and only
+the fields touched by the line-level diff are patched:
+- values on changed lines are re-read from the new line (prefix/suffix anchor)
+- values on deleted lines are dropped
+- skills on added lines are picked up with the skills gazetteer
+"""
+
+import copy
+import difflib
+import logging
+import re
+import threading
+import zlib
+from collections import OrderedDict, defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from suggestions import KeywordAutomaton
+
+logger = logging.getLogger("near_dup")
+logging.basicConfig(level=logging.INFO)
+
+NUM_PERM = 128
+SHINGLE_WORDS = 3
+DEFAULT_THRESHOLD = 0.85
+# ~6.5 KB per entry (compressed text, parse, signature, band keys):
+# 30k entries ≈ 200 MB, well inside a pool worker's RSS budget
+DEFAULT_MAX_ENTRIES = 30_000
+MIN_CANDIDATE_RECALL = 0.99   # P(pair at exactly the threshold becomes an LSH candidate)
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+GAZETTEER_PATH = Path(__file__).parent / "resources" / "skills_gazetteer.txt"
+
+_MONTHS = r"jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?"
+_DATE_RE = re.compile(
+    rf"\b(?:\d{{1,4}}[/.-]\d{{1,2}}[/.-]\d{{1,4}}|(?:{_MONTHS})\.?\s+\d{{1,2}}(?:st|nd|rd|th)?,?\s*\d{{0,4}}|\d{{1,2}}\s+(?:{_MONTHS})\.?,?\s*\d{{0,4}})\b",
+    re.IGNORECASE
+)
+
+
+# ========================================
+# 1. MINHASH
+# ========================================
+def normalize_jd(text: str) -> str:
+    """Lowercase, drop dates and punctuation, collapse whitespace"""
+    text = _DATE_RE.sub(" ", text.lower())
+    text = re.sub(r"[^\w\s+#]", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def shingles(text: str, k: int = SHINGLE_WORDS) -> np.ndarray:
+    words = normalize_jd(text).split()
+    if len(words) < k:
+        grams = [" ".join(words)] if words else []
+    else:
+        grams = [" ".join(words[i:i + k]) for i in range(len(words) - k + 1)]
+    return np.array(sorted({zlib.crc32(g.encode("utf-8")) for g in grams}), dtype=np.uint64)
+
+
+class MinHasher:
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = 1):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.a = rng.randint(1, int(_MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, int(_MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = shingles(text)
+        if hashes.size == 0:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        # (a*x + b) mod p, truncated to 32 bits; one row per permutation
+        phv = (np.outer(self.a, hashes) + self.b[:, None]) % _MERSENNE_PRIME & _MAX_HASH
+        return phv.min(axis=1)
+
+
+def jaccard_estimate(sig_a: np.ndarray, sig_b: np.ndarray) -> float:
+    return float(np.count_nonzero(sig_a == sig_b)) / len(sig_a)
+
+
+def candidate_probability(similarity: float, bands: int, rows: int) -> float:
+    """Chance that a pair with this Jaccard similarity shares at least one band"""
+    return 1 - (1 - similarity ** rows) ** bands
+
+
+def lsh_params(threshold: float, num_perm: int = NUM_PERM, min_recall: float = MIN_CANDIDATE_RECALL) -> Tuple[int, int]:
+    """
+    (bands, rows) with the most rows per band (fewest false-positive
+    candidates) that still make a pair AT the threshold a candidate with
+    probability >= min_recall. Candidates are verified with
+    jaccard_estimate, so extra ones only cost time, missed ones cost a parse.
+    """
+    options = [(num_perm // r, r) for r in range(num_perm, 0, -1) if num_perm % r == 0]
+    for bands, rows in options:
+        if candidate_probability(threshold, bands, rows) >= min_recall:
+            return bands, rows
+    return options[-1]
+
+
+# ========================================
+# 2. LSH INDEX
+# ========================================
+class NearDuplicateIndex:
+    """MinHash LSH index: id -> signature, with banded buckets for candidate lookup"""
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, num_perm: int = NUM_PERM):
+        self.threshold = threshold
+        self.hasher = MinHasher(num_perm)
+        self.bands, self.rows = lsh_params(threshold, num_perm)
+        self._buckets: List[Dict[bytes, List[int]]] = [defaultdict(list) for _ in range(self.bands)]
+        self._signatures: Dict[int, np.ndarray] = {}
+
+    def _band_keys(self, sig: np.ndarray) -> List[bytes]:
+        return [sig[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def add(self, doc_id: int, sig: np.ndarray) -> None:
+        self._signatures[doc_id] = sig
+        for band, key in zip(self._buckets, self._band_keys(sig)):
+            band[key].append(doc_id)
+
+    def remove(self, doc_id: int) -> None:
+        sig = self._signatures.pop(doc_id, None)
+        if sig is None:
+            return
+        for band, key in zip(self._buckets, self._band_keys(sig)):
+            ids = band.get(key)
+            if ids is not None:
+                ids.remove(doc_id)
+                if not ids:
+                    del band[key]
+
+    def query(self, sig: np.ndarray) -> Optional[Tuple[int, float]]:
+        """Most similar stored id with estimated Jaccard >= threshold"""
+        candidates = set()
+        for band, key in zip(self._buckets, self._band_keys(sig)):
+            candidates.update(band.get(key, ()))
+
+        best = None
+        for doc_id in candidates:
+            sim = jaccard_estimate(sig, self._signatures[doc_id])
+            if sim >= self.threshold and (best is None or sim > best[1]):
+                best = (doc_id, sim)
+        return best
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+
+# ========================================
+# 3. PATCHING A CACHED PARSE
+# ========================================
+_skill_automaton: Optional[KeywordAutomaton] = None
+_skill_names: List[str] = []
+
+
+def _skills_in(text: str) -> List[str]:
+    global _skill_automaton, _skill_names
+    if _skill_automaton is None:
+        lines = GAZETTEER_PATH.read_text(encoding="utf-8").splitlines()
+        _skill_names = [l.strip() for l in lines if l.strip() and not l.startswith("#")]
+        automaton = KeywordAutomaton()
+        for i, skill in enumerate(_skill_names):
+            automaton.add(skill, i)
+        automaton.build()
+        _skill_automaton = automaton
+    return [_skill_names[i] for i in _skill_automaton.find_rules(text)]
+
+
+def _rewrite(value: str, replaced: List[Tuple[str, str]], deleted: List[str]) -> Optional[str]:
+    """
+    New version of a value whose old line changed.
+    Returns the value unchanged if unaffected, None if it should be dropped.
+    """
+    needle = value.lower()
+    for old_line, new_line in replaced:
+        pos = old_line.lower().find(needle)
+        if pos < 0:
+            continue
+        prefix, suffix = old_line[:pos], old_line[pos + len(value):]
+        if new_line.startswith(prefix) and new_line.endswith(suffix) and len(new_line) > len(prefix) + len(suffix):
+            return new_line[len(prefix):len(new_line) - len(suffix)].strip()
+        if prefix.strip() and new_line.startswith(prefix):
+            return new_line[len(prefix):].strip()
+        return None
+    if any(needle in line.lower() for line in deleted):
+        return None
+    return value
+
+
+def patch_parsed(parsed: Dict[str, Any], old_text: str, new_text: str) -> Tuple[Dict[str, Any], List[str]]:
+    """Apply the old→new line diff to a cached parse; returns (patched, changed field names)"""
+    old_lines = [l.strip() for l in old_text.splitlines() if l.strip()]
+    new_lines = [l.strip() for l in new_text.splitlines() if l.strip()]
+
+    replaced: List[Tuple[str, str]] = []
+    deleted: List[str] = []
+    added: List[str] = []
+    matcher = difflib.SequenceMatcher(a=old_lines, b=new_lines, autojunk=False)
+    for op, i1, i2, j1, j2 in matcher.get_opcodes():
+        if op == "replace":
+            pairs = list(zip(old_lines[i1:i2], new_lines[j1:j2]))
+            replaced.extend(pairs)
+            deleted.extend(old_lines[i1 + len(pairs):i2])
+            added.extend(new_lines[j1 + len(pairs):j2])
+        elif op == "delete":
+            deleted.extend(old_lines[i1:i2])
+        elif op == "insert":
+            added.extend(new_lines[j1:j2])
+
+    patched = copy.deepcopy(parsed)
+    changed = []
+    if not replaced and not deleted and not added:
+        return patched, changed
+
+    new_lower = new_text.lower()
+    for field, value in parsed.items():
+        if isinstance(value, str) and value and value.lower() not in new_lower:
+            new_value = _rewrite(value, replaced, deleted)
+            if new_value != value:
+                patched[field] = new_value or ""
+                changed.append(field)
+        elif isinstance(value, list):
+            items = []
+            for item in value:
+                if isinstance(item, str) and item and item.lower() not in new_lower:
+                    item = _rewrite(item, replaced, deleted)
+                if item:
+                    items.append(item)
+            if items != value:
+                patched[field] = items
+                changed.append(field)
+
+    # Skills only mentioned on new / changed lines
+    new_content = "\n".join(added + [new for _, new in replaced])
+    if new_content and isinstance(patched.get("skills"), list):
+        known = {s.lower() for s in patched["skills"]}
+        extra = [s for s in _skills_in(new_content) if s.lower() not in known]
+        if extra:
+            patched["skills"] = patched["skills"] + extra
+            if "skills" not in changed:
+                changed.append("skills")
+
+    return patched, changed
+
+
+# ========================================
+# 4. CACHE
+# ========================================
+class NearDuplicateCache:
+    """Parsed-JD cache keyed by near-duplicate similarity (bounded, FIFO eviction)"""
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.index = NearDuplicateIndex(threshold)
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, Tuple[bytes, Dict[str, Any]]]" = OrderedDict()  # id -> (zlib text, parsed)
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.stats = {"lookups": 0, "hits": 0, "stored": 0}
+
+    def lookup(self, text: str) -> Optional[Dict[str, Any]]:
+        """Patched copy of the parse of a near-duplicate JD, or None"""
+        sig = self.index.hasher.signature(text)
+        with self._lock:
+            self.stats["lookups"] += 1
+            hit = self.index.query(sig)
+            if hit is None:
+                return None
+            doc_id, similarity = hit
+            packed, parsed = self._entries[doc_id]
+            self.stats["hits"] += 1
+
+        old_text = zlib.decompress(packed).decode("utf-8")
+        patched, changed = patch_parsed(parsed, old_text, text)
+        logger.info(f"Near-duplicate JD (similarity {similarity:.2f}) → reused parse, patched {changed or 'nothing'}")
+        return patched
+
+    def add(self, text: str, parsed: Dict[str, Any]) -> None:
+        sig = self.index.hasher.signature(text)
+        with self._lock:
+            doc_id = self._next_id
+            self._next_id += 1
+            self._entries[doc_id] = (zlib.compress(text.encode("utf-8")), copy.deepcopy(parsed))
+            self.index.add(doc_id, sig)
+            self.stats["stored"] += 1
+            while len(self._entries) > self.max_entries:
+                old_id, _ = self._entries.popitem(last=False)
+                self.index.remove(old_id)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# ========================================
+# BENCHMARK
+# ========================================
+if __name__ == "__main__":
+    import argparse
+    import random
+    import time
+
+    parser = argparse.ArgumentParser(description="Benchmark near-duplicate JD lookups")
+    parser.add_argument("--size", type=int, default=100_000, help="Number of stored synthetic JDs")
+    parser.add_argument("--queries", type=int, default=1_000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    vocab = [f"w{i}" for i in range(20_000)]
+
+    def fake_jd():
+        return "\n".join(" ".join(rng.choices(vocab, k=12)) for _ in range(25))
+
+    cache = NearDuplicateCache(max_entries=args.size)
+    docs = []
+    t0 = time.perf_counter()
+    for i in range(args.size):
+        jd = fake_jd()
+        if i < args.queries:
+            docs.append(jd)
+        cache.add(jd, {"job_title": f"Role {i}", "skills": []})
+    bands, rows = cache.index.bands, cache.index.rows
+    print(f"Indexed {len(cache)} JDs in {time.perf_counter() - t0:.1f}s (bands={bands}, rows={rows})")
+    for sim in (cache.index.threshold, 0.90, 0.95):
+        print(f"  LSH candidate recall at J={sim:.2f}: {candidate_probability(sim, bands, rows):.3f}")
+
+    def near_dup(jd, edits):
+        # Each replaced word changes 3 of ~298 shingles: 6 edits → J ≈ 0.89
+        words = jd.split(" ")
+        for pos in rng.sample(range(len(words)), edits):
+            words[pos] = rng.choice(vocab)
+        return " ".join(words) + "\nPosted March 3, 2025"
+
+    t0 = time.perf_counter()
+    hits = sum(cache.lookup(near_dup(jd, 1)) is not None for jd in docs)
+    per_query = (time.perf_counter() - t0) / len(docs)
+    print(f"{hits}/{len(docs)} near-duplicates found (1 word edited), {per_query * 1000:.2f} ms/query")
+
+    hits = sum(cache.lookup(near_dup(jd, 6)) is not None for jd in docs)
+    print(f"{hits}/{len(docs)} near-duplicates found (6 words edited, J ≈ 0.89)")
@@ -0,0 +1,224 @@
+"""
+Offline spaCy-based parser for resumes and job descriptions.
+
+No network calls: skills come from an entity-ruler gazetteer
+(resources/skills_gazetteer.txt), job titles from token patterns, and
+people / organisations / places / dates from the statistical NER model
+when one is installed (en_core_web_sm), otherwise from the rules alone.
+
+Batch API runs on nlp.pipe(..., n_process=N, batch_size=B) so a whole
+directory can be parsed on all cores.
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import spacy
+
+from parse_resume import clean_text, extract_email, extract_phone, extract_name
+
+logger = logging.getLogger("parse_spacy")
+logging.basicConfig(level=logging.INFO)
+
+SPACY_MODEL = "en_core_web_sm"
+GAZETTEER_PATH = Path(__file__).parent / "resources" / "skills_gazetteer.txt"
+
+SENIORITY = ["junior", "senior", "lead", "principal", "staff", "chief", "head", "associate", "intern"]
+ROLE_NOUNS = [
+    "engineer", "scientist", "developer", "analyst", "manager", "architect", "consultant",
+    "researcher", "designer", "specialist", "administrator", "director", "officer", "programmer"
+]
+
+ENTITY_LABELS = ["PERSON", "ORG", "GPE", "LOC", "DATE"]
+
+
+# -------------------------
+# Pipeline
+# -------------------------
+def load_gazetteer(path: Path = GAZETTEER_PATH) -> List[str]:
+    lines = Path(path).read_text(encoding="utf-8").splitlines()
+    return [l.strip() for l in lines if l.strip() and not l.startswith("#")]
+
+
+def build_nlp(model: str = SPACY_MODEL, gazetteer: Optional[List[str]] = None):
+    """spaCy pipeline + entity ruler (SKILL / TITLE patterns)"""
+    try:
+        nlp = spacy.load(model, exclude=["lemmatizer", "textcat"])
+    except OSError:
+        logger.warning(f"spaCy model '{model}' not installed → rules only (python -m spacy download {model})")
+        nlp = spacy.blank("en")
+
+    ruler_config = {"phrase_matcher_attr": "LOWER", "overwrite_ents": True}
+    if "ner" in nlp.pipe_names:
+        ruler = nlp.add_pipe("entity_ruler", before="ner", config=ruler_config)
+    else:
+        ruler = nlp.add_pipe("entity_ruler", config=ruler_config)
+
+    skills = gazetteer if gazetteer is not None else load_gazetteer()
+    patterns = [{"label": "SKILL", "pattern": skill, "id": skill} for skill in skills]
+
+    # e.g. "Senior Data Scientist", "ML Engineer", "Software Developer"
+    role = {"LOWER": {"IN": ROLE_NOUNS}}
+    patterns.append({"label": "TITLE", "pattern": [{"LOWER": {"IN": SENIORITY}}, role]})
+    for n_words in (1, 2):
+        patterns.append({
+            "label": "TITLE",
+            "pattern": [{"LOWER": {"IN": SENIORITY}, "OP": "?"}] + [{"IS_TITLE": True}] * n_words + [role]
+        })
+    ruler.add_patterns(patterns)
+
+    logger.info(f"spaCy pipeline ready: {nlp.pipe_names} ({len(skills)} gazetteer skills)")
+    return nlp
+
+
+_nlp = None
+
+
+def get_nlp():
+    """Shared pipeline, built on first use"""
+    global _nlp
+    if _nlp is None:
+        _nlp = build_nlp()
+    return _nlp
+
+
+# -------------------------
+# Doc -> parsed dict
+# -------------------------
+def _unique(items: Iterable[str]) -> List[str]:
+    seen, out = set(), []
+    for item in items:
+        key = item.lower()
+        if item and key not in seen:
+            seen.add(key)
+            out.append(item)
+    return out
+
+
+def doc_to_dict(doc, doc_type: str = "resume", file_name: str = None) -> Dict[str, Any]:
+    skills = _unique(ent.ent_id_ or ent.text for ent in doc.ents if ent.label_ == "SKILL")
+    titles = _unique(" ".join(ent.text.split()) for ent in doc.ents if ent.label_ == "TITLE")
+    entities = {
+        label: _unique(ent.text.strip() for ent in doc.ents if ent.label_ == label)
+        for label in ENTITY_LABELS
+    }
+    entities = {k: v for k, v in entities.items() if v}
+
+    if doc_type == "jd":
+        locations = entities.get("GPE", []) + entities.get("LOC", [])
+        return {
+            "job_title": titles[0] if titles else "",
+            "company": entities.get("ORG", [""])[0],
+            "location": locations[0] if locations else "",
+            "skills": skills,
+            "titles": titles,
+            "entities": entities
+        }
+
+    text = doc.text
+    people = entities.get("PERSON", [])
+    return {
+        "name": people[0] if people and people[0] in text[:300] else extract_name(text, file_name),
+        "email": extract_email(text),
+        "phone": extract_phone(text),
+        "skills": skills,
+        "titles": titles,
+        "entities": entities
+    }
+
+
+# -------------------------
+# Public API
+# -------------------------
+def parse_spacy(text: str, doc_type: str = "resume", file_name: str = None) -> Dict[str, Any]:
+    """Parse a single document offline"""
+    return doc_to_dict(get_nlp()(clean_text(text)), doc_type, file_name)
+
+
+def parse_batch(
+    texts: Iterable[str],
+    doc_type: str = "resume",
+    n_process: int = 1,
+    batch_size: int = 64
+) -> Iterator[Dict[str, Any]]:
+    """Parse many documents with nlp.pipe; yields results in input order"""
+    cleaned = (clean_text(t or "") for t in texts)
+    for doc in get_nlp().pipe(cleaned, n_process=n_process, batch_size=batch_size):
+        yield doc_to_dict(doc, doc_type)
+
+
+def _read(path: str) -> Tuple[str, str]:
+    from extractor import extract_text_from_file
+    try:
+        return clean_text(extract_text_from_file(path)), path
+    except Exception as e:
+        logger.error(f"Extraction failed ({path}): {e}")
+        return "", path
+
+
+def parse_directory(
+    directory: str,
+    doc_type: str = "resume",
+    n_process: int = 1,
+    batch_size: int = 64
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Extract + parse every supported file under a directory; yields (path, parsed).
+    n_process is the total process budget: it is split between extraction
+    (spawned workers) and nlp.pipe so the two stages do not oversubscribe.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    from extractor import SUPPORTED
+
+    paths = sorted(str(p) for p in Path(directory).rglob("*") if p.suffix.lower() in SUPPORTED)
+    extract_procs = n_process // 2
+    nlp_procs = max(1, n_process - extract_procs)
+    logger.info(f"Parsing {len(paths)} files from {directory} "
+                f"(extract={extract_procs or 'inline'}, nlp={nlp_procs}, batch_size={batch_size})")
+
+    if extract_procs == 0:
+        texts = map(_read, paths)
+        for doc, path in get_nlp().pipe(texts, as_tuples=True, n_process=nlp_procs, batch_size=batch_size):
+            yield path, doc_to_dict(doc, doc_type, path)
+        return
+
+    # spawn, not fork: the parent already holds the spaCy pipeline
+    with ProcessPoolExecutor(max_workers=extract_procs, mp_context=multiprocessing.get_context("spawn")) as pool:
+        texts = pool.map(_read, paths, chunksize=16)
+        docs = get_nlp().pipe(texts, as_tuples=True, n_process=nlp_procs, batch_size=batch_size)
+        for doc, path in docs:
+            yield path, doc_to_dict(doc, doc_type, path)
+
+
+# -------------------------
+# CLI
+# -------------------------
+if __name__ == "__main__":
+    import argparse
+    import os
+
+    parser = argparse.ArgumentParser(description="Offline spaCy parser (file or directory)")
+    parser.add_argument("path", help="File or directory of resumes / JDs")
+    parser.add_argument("doc_type", choices=["resume", "jd"])
+    parser.add_argument("--n-process", type=int, default=os.cpu_count() or 1,
+                        help="Total processes, split between extraction and nlp.pipe")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--out", help="Write JSON lines here instead of stdout")
+    args = parser.parse_args()
+
+    if Path(args.path).is_dir():
+        out = open(args.out, "w", encoding="utf-8") if args.out else None
+        count = 0
+        for path, parsed in parse_directory(args.path, args.doc_type, args.n_process, args.batch_size):
+            line = json.dumps({"file": path, **parsed}, ensure_ascii=False)
+            print(line, file=out)
+            count += 1
+        if out:
+            out.close()
+            print(f"Parsed {count} files → {args.out}")
+    else:
+        text, _ = _read(args.path)
+        print(json.dumps(parse_spacy(text, args.doc_type, args.path), indent=2, ensure_ascii=False))
@@ -1,20 +1,49 @@
 # src/parser.py
+import asyncio
 import json
 import re
 import logging
-from typing import Dict, Any
-from groq import Groq
-from dotenv import load_dotenv
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Tuple
+from llm import LLM_MAX_CONNECTIONS, chat_completion  # shared Groq call layer (loads .env)
+from singleflight import SingleFlight, make_key
+from profiling import profile_stage
 
 
-# Load environment variables
-load_dotenv()
-
 # === CONFIG ===
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("parser")
 
-client = Groq()  # Make sure GROQ_API_KEY is in your environment!
+PARSE_MODEL = "llama-3.3-70b-versatile"
+
+# Identical prompts in flight at the same time share one Groq call
+groq_flight = SingleFlight()
+
+MAX_PROMPT_CHARS = 12000   # text sent in one parse prompt
+CHUNK_CHARS = 6000         # target chunk size for map-reduce parsing
+# Parallel Groq calls per document. Every chunk gets its own call so latency
+# tracks the largest chunk; capped by the shared HTTP pool (PARSE_CHUNK_WORKERS)
+CHUNK_WORKERS = int(os.getenv("PARSE_CHUNK_WORKERS", str(LLM_MAX_CONNECTIONS)))
+
+# Optional offline backend (spaCy + skill gazetteer)
+try:
+    from parse_spacy import parse_spacy
+except ImportError:
+    parse_spacy = None
+
+# Near-duplicate JD cache: reposted JDs reuse (and patch) an earlier parse
+try:
+    from near_dup import NearDuplicateCache
+    jd_cache = (
+        NearDuplicateCache(
+            threshold=float(os.getenv("JD_NEAR_DUP_THRESHOLD", "0.85")),
+            max_entries=int(os.getenv("JD_NEAR_DUP_MAX_ENTRIES", "30000"))   # ~6.5 KB each
+        )
+        if os.getenv("JD_NEAR_DUP", "1") == "1" else None
+    )
+except ImportError:
+    jd_cache = None
 
 # Try to import your existing rule-based parsers (optional fallback)
 try:
@@ -30,66 +59,215 @@ except ImportError:
 # ========================================
 # 1. GROQ-POWERED JD & RESUME PARSER (THE MAGIC)
 # ========================================
-def parse_with_groq(text: str, doc_type: str = "jd") -> Dict[str, Any]:
-    """Uses Groq 70B to perfectly parse JD or Resume in <1 second"""
-    
-    schema = {
-        "jd": """
-        {
-          "job_title": "Senior Data Scientist",
-          "company": "Farmdar",
-          "location": "Lahore, Pakistan",
-          "skills": ["Python", "GDAL", "Remote Sensing", "Machine Learning"],
-          "responsibilities": ["Build geospatial models", "Process satellite imagery"],
-          "requirements": ["5+ years in Python", "Experience with GIS tools"],
-          "nice_to_have": ["AgriTech domain", "Docker"]
-        }
-        """,
-        "resume": """
-        {
-          "name": "John Doe",
-          "email": "john@example.com",
-          "phone": "+92 300 1234567",
-          "skills": ["Python", "TensorFlow", "AWS", "Docker"],
-          "experience": ["Led ML team at XYZ", "Built computer vision models"],
-          "education": "MS Computer Science, LUMS"
-        }
-        """
+PARSE_SCHEMAS = {
+    "jd": """
+    {
+      "job_title": "Senior Data Scientist",
+      "company": "Farmdar",
+      "location": "Lahore, Pakistan",
+      "skills": ["Python", "GDAL", "Remote Sensing", "Machine Learning"],
+      "responsibilities": ["Build geospatial models", "Process satellite imagery"],
+      "requirements": ["5+ years in Python", "Experience with GIS tools"],
+      "nice_to_have": ["AgriTech domain", "Docker"]
     }
+    """,
+    "resume": """
+    {
+      "name": "John Doe",
+      "email": "john@example.com",
+      "phone": "+92 300 1234567",
+      "skills": ["Python", "TensorFlow", "AWS", "Docker"],
+      "experience": ["Led ML team at XYZ", "Built computer vision models"],
+      "education": "MS Computer Science, LUMS"
+    }
+    """
+}
+
 
-    prompt = f"""
+def build_parse_prompt(text: str, doc_type: str = "jd") -> str:
+    return f"""
 You are a professional ATS parser. Extract information from the following {doc_type.upper()} into valid JSON.
 
 Return ONLY the JSON object. No explanations. No markdown.
 
 EXAMPLE OUTPUT for {doc_type}:
-{schema.get(doc_type, schema["jd"])}
+{PARSE_SCHEMAS.get(doc_type, PARSE_SCHEMAS["jd"])}
 
 TEXT:
-{text[:12000]}
+{text[:MAX_PROMPT_CHARS]}
 """
 
+
+def _groq_complete(prompt: str) -> str:
+    return chat_completion(prompt, model=PARSE_MODEL, temperature=0.1, max_tokens=1024)
+
+
+def _prompt_key(prompt: str) -> str:
+    return make_key(PARSE_MODEL, 0.1, 1024, prompt)
+
+
+def _json_from_raw(raw: str) -> Dict[str, Any]:
+    # Extract JSON block
+    match = re.search(r"\{.*\}", raw, re.DOTALL)
+    if match:
+        return json.loads(match.group(0))
+    else:
+        logger.warning("No JSON found, returning raw")
+        return {"raw_output": raw}
+
+
+def parse_with_groq(text: str, doc_type: str = "jd") -> Dict[str, Any]:
+    """Uses Groq 70B to perfectly parse JD or Resume in <1 second"""
+    prompt = build_parse_prompt(text, doc_type)
     try:
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.1,
-            max_tokens=1024
-        )
-        raw = response.choices[0].message.content.strip()
+        raw = groq_flight.do(_prompt_key(prompt), lambda: _groq_complete(prompt))
+        return _json_from_raw(raw)
+    except Exception as e:
+        logger.error(f"Groq failed: {e}")
+        return {}
 
-        # Extract JSON block
-        match = re.search(r"\{.*\}", raw, re.DOTALL)
-        if match:
-            return json.loads(match.group(0))
-        else:
-            logger.warning("No JSON found, returning raw")
-            return {"raw_output": raw}
 
+async def parse_with_groq_async(text: str, doc_type: str = "jd") -> Dict[str, Any]:
+    """Same as parse_with_groq for asyncio callers (shares in-flight calls with it)"""
+    prompt = build_parse_prompt(text, doc_type)
+    try:
+        raw = await groq_flight.do_async(_prompt_key(prompt), lambda: asyncio.to_thread(_groq_complete, prompt))
+        return _json_from_raw(raw)
     except Exception as e:
         logger.error(f"Groq failed: {e}")
         return {}
 
+
+# ========================================
+# 1b. CHUNKED MAP-REDUCE PARSE (long CVs)
+# ========================================
+SECTION_HEADINGS = [
+    "summary", "objective", "profile", "skills", "technical skills", "experience",
+    "work experience", "employment", "projects", "education", "certifications",
+    "publications", "research", "teaching", "awards", "grants", "presentations",
+    "languages", "references", "responsibilities", "requirements", "must-haves",
+    "nice-to-have", "qualifications", "benefits", "company overview", "work environment"
+]
+_HEADING_RE = re.compile(
+    r"^\s*(?:" + "|".join(re.escape(h) for h in SECTION_HEADINGS) + r")\s*:?\s*$",
+    re.IGNORECASE
+)
+
+# Fields where chunk results are concatenated instead of first-wins
+MERGE_LIST_FIELDS = ["skills", "responsibilities", "requirements", "nice_to_have", "experience",
+                     "projects", "certifications", "publications"]
+
+
+def split_sections(text: str) -> List[str]:
+    """Split text at heading lines; each piece starts with its heading"""
+    sections, current = [], []
+    for line in text.split("\n"):
+        if _HEADING_RE.match(line) and any(l.strip() for l in current):
+            sections.append("\n".join(current).strip())
+            current = []
+        current.append(line)
+    if any(l.strip() for l in current):
+        sections.append("\n".join(current).strip())
+    return sections
+
+
+def _split_oversized(section: str, max_chars: int) -> List[str]:
+    """Break a single huge section at paragraph, then line, boundaries"""
+    pieces, current = [], ""
+    for sep_unit in re.split(r"(\n\n)", section):
+        units = [sep_unit] if len(sep_unit) <= max_chars else [l + "\n" for l in sep_unit.split("\n")]
+        for unit in units:
+            while len(unit) > max_chars:   # one enormous line
+                pieces.append(unit[:max_chars])
+                unit = unit[max_chars:]
+            if current and len(current) + len(unit) > max_chars:
+                pieces.append(current.strip())
+                current = ""
+            current += unit
+    if current.strip():
+        pieces.append(current.strip())
+    return pieces
+
+
+def split_units(text: str, max_chars: int = CHUNK_CHARS) -> List[str]:
+    """Sections in document order, oversized ones broken to fit max_chars"""
+    units = []
+    for section in split_sections(text):
+        units.extend([section] if len(section) <= max_chars else _split_oversized(section, max_chars))
+    return units
+
+
+def split_into_chunks(text: str, max_chars: int = CHUNK_CHARS) -> List[str]:
+    """Pack whole sections into chunks of at most max_chars"""
+    chunks, current = [], ""
+    for part in split_units(text, max_chars):
+        if current and len(current) + len(part) + 2 > max_chars:
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n\n{part}" if current else part
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def merge_parsed_chunks(parts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Deterministic reduce over chunk results (in document order):
+    - list fields: concatenated, case-insensitive duplicates dropped
+    - everything else: first non-empty value wins
+    """
+    merged: Dict[str, Any] = {}
+    seen: Dict[str, set] = {}
+
+    for part in parts:
+        for key, value in part.items():
+            if key == "raw_output" or value in (None, "", [], {}):
+                continue
+
+            if key in MERGE_LIST_FIELDS or isinstance(value, list):
+                items = value if isinstance(value, list) else [value]
+                bucket = merged.setdefault(key, [])
+                if not isinstance(bucket, list):
+                    bucket = merged[key] = [bucket]
+                keys = seen.setdefault(key, {json.dumps(x, sort_keys=True).lower() for x in bucket})
+                for item in items:
+                    norm = item.strip().lower() if isinstance(item, str) else json.dumps(item, sort_keys=True).lower()
+                    if norm and norm not in keys:
+                        keys.add(norm)
+                        bucket.append(item)
+            elif key not in merged:
+                merged[key] = value
+
+    return merged
+
+
+def parse_failed(part: Dict[str, Any]) -> bool:
+    """parse_with_groq returns {} when the call failed and raw_output when the JSON was unusable"""
+    return not part or "raw_output" in part
+
+
+def parse_with_groq_chunked(text: str, doc_type: str = "jd",
+                            max_chars: int = CHUNK_CHARS, max_workers: int = CHUNK_WORKERS) -> Tuple[Dict[str, Any], int]:
+    """
+    Map: parse every section chunk in parallel. Reduce: merge partial JSON.
+    Returns (merged, failed_chunks); merge_parsed_chunks silently skips
+    failed chunks, so callers must not cache a result with failures.
+    """
+    chunks = split_into_chunks(text, max_chars)
+    if len(chunks) <= 1:
+        result = parse_with_groq(text, doc_type)
+        return result, int(parse_failed(result))
+
+    logger.info(f"Map-reduce parse: {len(chunks)} chunks (largest {max(map(len, chunks))} chars)")
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as pool:
+        parts = list(pool.map(lambda chunk: parse_with_groq(chunk, doc_type), chunks))
+
+    failed = sum(parse_failed(p) for p in parts)
+    if failed:
+        logger.warning(f"Map-reduce parse: {failed}/{len(chunks)} chunks failed")
+    return merge_parsed_chunks(parts), failed
+
+
 def remove_garbage_keys(data: Dict[str, Any]) -> Dict[str, Any]:
     """Remove known garbage keys that sometimes leak from rule-based parsers"""
     garbage = ["sections", "raw_text", "header", "footer", "metadata", "summary"]
@@ -138,28 +316,24 @@ def clean_list(items):
 # ========================================
 # 3. MAIN PARSER (Smart: Rule → Groq → Clean)
 # ========================================
-def parse_document(text: str, doc_type: str = "resume", file_name: str = None) -> Dict[str, Any]:
-    if not text or len(text) < 50:
-        return {"error": "Empty or too short text"}
-
-    logger.info(f"Parsing {doc_type.upper()} ({len(text)} chars)...")
-
-    # Step 1: Try rule-based first (only if exists and good)
+def parse_rules(text: str, doc_type: str = "resume", file_name: str = None) -> Dict[str, Any]:
+    """Rule-based parse (only if the parser exists and succeeds)"""
     parsed = {}
-    if doc_type == "resume" and parse_resume and callable(parse_resume):
-        try:
-            parsed = parse_resume(text, file_name) or {}
-        except:
-            parsed = {}
-    elif doc_type == "jd" and parse_jd and callable(parse_jd):
-        try:
-            parsed = parse_jd(text) or {}
-        except:
-            parsed = {}
-
-    # Step 2: Always use Groq — it's better and instant
-    groq_data = parse_with_groq(text, doc_type)
+    with profile_stage("parse.rules"):
+        if doc_type == "resume" and parse_resume and callable(parse_resume):
+            try:
+                parsed = parse_resume(text, file_name) or {}
+            except:
+                parsed = {}
+        elif doc_type == "jd" and parse_jd and callable(parse_jd):
+            try:
+                parsed = parse_jd(text) or {}
+            except:
+                parsed = {}
+    return parsed
 
+
+def merge_and_clean(parsed: Dict[str, Any], groq_data: Dict[str, Any]) -> Dict[str, Any]:
     # Step 3: Merge (Groq wins on conflict)
     result = {**parsed, **groq_data}
 
@@ -175,7 +349,57 @@ def parse_document(text: str, doc_type: str = "resume", file_name: str = None) -
     if isinstance(result["skills"], str):
         result["skills"] = [s.strip() for s in result["skills"].split(",") if s.strip()]
 
-    result = remove_garbage_keys(result)
+    return remove_garbage_keys(result)
+
+
+def parse_document(text: str, doc_type: str = "resume", file_name: str = None,
+                   mode: str = "auto", backend: str = "groq") -> Dict[str, Any]:
+    """
+    backend: "groq"  — LLM parse (default)
+             "spacy" — offline spaCy + gazetteer parse, no network calls
+    mode (groq only):
+          "single"  — one Groq call (text truncated to MAX_PROMPT_CHARS)
+          "chunked" — map-reduce over section chunks
+          "auto"    — chunked only when the text does not fit one prompt
+    """
+    if not text or len(text) < 50:
+        return {"error": "Empty or too short text"}
+
+    logger.info(f"Parsing {doc_type.upper()} ({len(text)} chars)...")
+
+    # Step 0: Reposted JD with trivial edits → reuse the earlier parse
+    use_jd_cache = doc_type == "jd" and backend == "groq" and jd_cache is not None
+    if use_jd_cache:
+        cached = jd_cache.lookup(text)
+        if cached is not None:
+            return cached
+
+    # Step 1: Try rule-based first (only if exists and good)
+    parsed = parse_rules(text, doc_type, file_name)
+
+    # Step 2: Groq (or the offline spaCy backend when asked for)
+    failed = False
+    if backend == "spacy":
+        if parse_spacy is None:
+            return {"error": "spaCy backend not available. Run: pip install spacy"}
+        with profile_stage("parse.spacy"):
+            groq_data = parse_spacy(text, doc_type, file_name)
+    elif mode == "chunked" or (mode == "auto" and len(text) > MAX_PROMPT_CHARS):
+        with profile_stage("parse.llm"):
+            groq_data, failed_chunks = parse_with_groq_chunked(text, doc_type)
+        failed = failed_chunks > 0
+    else:
+        with profile_stage("parse.llm"):
+            groq_data = parse_with_groq(text, doc_type)
+        failed = parse_failed(groq_data)
+
+    # Steps 3-5: Merge, clean lists, normalize skills
+    result = merge_and_clean(parsed, groq_data)
+
+    # Only cache real LLM parses, never a failed call or a partially failed map-reduce
+    if use_jd_cache and not failed:
+        jd_cache.add(text, result)
+
     logger.info(f"Parsed {doc_type} successfully!")
     return result
 
@@ -187,13 +411,29 @@ if __name__ == "__main__":
     import sys
     from extractor import extract_text_from_file
 
+    args = sys.argv[1:]
+    profile_path = None
+    if "--profile" in args:
+        i = args.index("--profile")
+        has_path = i + 1 < len(args) and args[i + 1].endswith(".json")
+        profile_path = args[i + 1] if has_path else "output/memory_profile.json"
+        del args[i:i + 1 + has_path]
+        import profiling
+        profiling.enable(profile_path)
+    sys.argv[1:] = args
+
     if len(sys.argv) < 3:
-        print("Usage: python src/parser.py <file_path> <resume|jd>")
+        print("Usage: python src/parser.py <file_path> <resume|jd> [groq|spacy] [--profile [out.json]]")
         sys.exit(1)
 
     file_path = sys.argv[1]
     doc_type = sys.argv[2].lower()
+    backend = sys.argv[3].lower() if len(sys.argv) > 3 else "groq"
 
     text = extract_text_from_file(file_path)
-    result = parse_document(text, doc_type=doc_type, file_name=file_path)
-    print(json.dumps(result, indent=2, ensure_ascii=False))
\ No newline at end of file
+    result = parse_document(text, doc_type=doc_type, file_name=file_path, backend=backend)
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+
+    if profile_path:
+        profiling.get_profiler().print_summary()
+        print(f"\nMemory profile saved to {profiling.dump_if_enabled()}")
\ No newline at end of file
@@ -0,0 +1,248 @@
+# src/profiling.py
+"""
+Per-stage memory profiling (tracemalloc).
+
+Enable with the PROFILE_MEMORY env var (a JSON output path, or "1" for
+output/memory_profile.json) or the --profile flag of the CLIs. Pipeline
+code marks its stages with:
+
+    with profile_stage("extract.pdf"):
+        ...
+
+For each stage the report records peak and retained traced memory, RSS
+before/after and the top allocation sites (diff of snapshots taken around
+the stage), as JSON that can be diffed between releases.
+When profiling is off, profile_stage() is a no-op.
+
+tracemalloc's peak counter is process-wide and every stage resets it, so
+only one thread is profiled at a time: while a thread is inside a stage,
+stages opened on other threads (e.g. speculative tailoring started from
+app.analyze) run unprofiled and are counted as skipped_concurrent_stages.
+Their allocations still land in the owning stage's numbers; profile single
+requests (CLI runs) when exact attribution matters.
+"""
+
+import contextlib
+import functools
+import json
+import os
+import platform
+import threading
+import time
+import tracemalloc
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+PROFILE_ENV = "PROFILE_MEMORY"
+DEFAULT_REPORT_PATH = "output/memory_profile.json"
+TOP_SITES = 10
+MAX_STAGES = 1000    # keep the report bounded in long-running apps
+
+
+def rss_mb() -> float:
+    """Current resident set size of this process"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024   # peak, Linux KB
+
+
+class MemoryProfiler:
+    def __init__(self, report_path: str = DEFAULT_REPORT_PATH, nframes: int = 1, top: int = TOP_SITES):
+        self.report_path = report_path
+        self.nframes = nframes
+        self.top = top
+        self.stages: deque = deque(maxlen=MAX_STAGES)
+        self._local = threading.local()   # per-thread stack of open stages
+        self._owner_lock = threading.Lock()
+        self._owner: Optional[int] = None   # thread currently inside a stage
+        self._owner_depth = 0
+        self.skipped_concurrent = 0
+        self._filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        ]
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(nframes)
+
+    def _snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces(self._filters)
+
+    @property
+    def _stack(self) -> List[Dict[str, Any]]:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def _acquire(self) -> bool:
+        me = threading.get_ident()
+        with self._owner_lock:
+            if self._owner not in (None, me):
+                self.skipped_concurrent += 1
+                return False
+            self._owner = me
+            self._owner_depth += 1
+            return True
+
+    def _release(self) -> None:
+        with self._owner_lock:
+            self._owner_depth -= 1
+            if not self._owner_depth:
+                self._owner = None
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        if not self._acquire():
+            yield   # another thread owns the peak counter
+            return
+        try:
+            with self._measure(name):
+                yield
+        finally:
+            self._release()
+
+    @contextlib.contextmanager
+    def _measure(self, name: str):
+        # Baseline is taken after our own snapshot so it is not billed to the stage
+        pre_snapshot, _ = tracemalloc.get_traced_memory()
+        before = self._snapshot()
+        rss_before = rss_mb()
+        current, _ = tracemalloc.get_traced_memory()
+        overhead = current - pre_snapshot
+        frame = {"child_peak": current}
+        self._stack.append(frame)
+        tracemalloc.reset_peak()
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - t0
+            after_current, after_peak = tracemalloc.get_traced_memory()
+            peak = max(after_peak, frame["child_peak"])
+            self._stack.pop()
+            if self._stack:
+                # Our reset_peak hid the parent's peak so far; hand ours up,
+                # minus the snapshot we were holding
+                parent = self._stack[-1]
+                parent["child_peak"] = max(parent["child_peak"], peak - overhead)
+
+            after = self._snapshot()
+            sites = after.compare_to(before, "lineno")[:self.top]
+            del before, after
+            self.stages.append({
+                "stage": name,
+                "depth": len(self._stack),
+                "duration_s": round(elapsed, 4),
+                "peak_bytes": peak - current,
+                "retained_bytes": after_current - current,
+                "rss_before_mb": round(rss_before, 1),
+                "rss_after_mb": round(rss_mb(), 1),
+                "top_allocations": [
+                    {
+                        "site": f"{s.traceback[0].filename}:{s.traceback[0].lineno}",
+                        "size_diff_bytes": s.size_diff,
+                        "size_bytes": s.size,
+                        "count_diff": s.count_diff,
+                    }
+                    for s in sites if s.size_diff
+                ],
+            })
+            # The snapshots above must not show up in an enclosing stage's peak
+            tracemalloc.reset_peak()
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Per stage name: calls, max peak, total retained"""
+        out: Dict[str, Dict[str, Any]] = {}
+        for s in self.stages:
+            agg = out.setdefault(s["stage"], {"calls": 0, "max_peak_bytes": 0, "retained_bytes": 0, "total_s": 0.0})
+            agg["calls"] += 1
+            agg["max_peak_bytes"] = max(agg["max_peak_bytes"], s["peak_bytes"])
+            agg["retained_bytes"] += s["retained_bytes"]
+            agg["total_s"] = round(agg["total_s"] + s["duration_s"], 4)
+        return out
+
+    def report(self) -> Dict[str, Any]:
+        current, peak = tracemalloc.get_traced_memory()
+        return {
+            "python": platform.python_version(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "traced_current_bytes": current,
+            "rss_mb": round(rss_mb(), 1),
+            "skipped_concurrent_stages": self.skipped_concurrent,
+            "summary": self.summary(),
+            "stages": list(self.stages),
+        }
+
+    def dump(self, path: Optional[str] = None) -> str:
+        path = path or self.report_path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+        return path
+
+    def print_summary(self) -> None:
+        print("\n=== Memory per stage (tracemalloc) ===")
+        for name, agg in self.summary().items():
+            print(f"{name:<24} calls={agg['calls']:<4} peak={agg['max_peak_bytes'] / 2**20:8.2f} MB  "
+                  f"retained={agg['retained_bytes'] / 2**20:8.2f} MB  time={agg['total_s']:.2f}s")
+
+
+# ========================================
+# GLOBAL PROFILER
+# ========================================
+_profiler: Optional[MemoryProfiler] = None
+
+
+def enable(report_path: Optional[str] = None, nframes: int = 1) -> MemoryProfiler:
+    global _profiler
+    if _profiler is None:
+        _profiler = MemoryProfiler(report_path or DEFAULT_REPORT_PATH, nframes=nframes)
+    elif report_path:
+        _profiler.report_path = report_path
+    return _profiler
+
+
+def get_profiler() -> Optional[MemoryProfiler]:
+    return _profiler
+
+
+def profile_stage(name: str):
+    """Context manager for a pipeline stage (no-op unless profiling is enabled)"""
+    if _profiler is None:
+        return contextlib.nullcontext()
+    return _profiler.stage(name)
+
+
+def dump_if_enabled() -> Optional[str]:
+    return _profiler.dump() if _profiler is not None else None
+
+
+def profiled(name: str, dump: bool = False):
+    """Decorator: run the function as one stage; optionally rewrite the report after each call"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _profiler is None:
+                return fn(*args, **kwargs)
+            try:
+                with _profiler.stage(name):
+                    return fn(*args, **kwargs)
+            finally:
+                if dump:
+                    _profiler.dump()
+        return wrapper
+    return decorator
+
+
+# Env flag: turn profiling on as early as the first pipeline import
+if os.getenv(PROFILE_ENV):
+    _value = os.getenv(PROFILE_ENV)
+    enable(DEFAULT_REPORT_PATH if _value == "1" else _value)
@@ -0,0 +1,198 @@
+# src/service.py
+"""
+Async HTTP service for the pipeline.
+
+    POST /extract   multipart file           → {"text", "chars"}
+    POST /parse     {"text", "doc_type"}     → parsed JSON
+    POST /match     {"parsed_resume", ...}   → match report
+    POST /tailor    {"parsed_resume", ...}   → summary + skills
+    GET  /health
+
+- CPU-bound extraction (pdfplumber / docx2txt) runs on a bounded process pool
+- LLM-bound work runs on a bounded thread pool and shares one pooled
+  keep-alive HTTP client (llm.http_client)
+- Backpressure: beyond SERVICE_MAX_INFLIGHT concurrent requests the service
+  answers 429 with Retry-After instead of queueing without limit
+
+Run:  uvicorn service:app --app-dir src --host 0.0.0.0 --port 8000
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, File, HTTPException, Request, UploadFile
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+import llm
+from extractor import SUPPORTED, extract_text_from_file
+from parser import groq_flight, parse_document
+from matcher import get_match_report
+from tailor_llm import tailor_summary_and_skills
+
+logger = logging.getLogger("service")
+logging.basicConfig(level=logging.INFO)
+
+EXTRACT_WORKERS = int(os.getenv("SERVICE_EXTRACT_WORKERS", str(os.cpu_count() or 1)))
+LLM_THREADS = int(os.getenv("SERVICE_LLM_THREADS", "32"))
+MAX_INFLIGHT = int(os.getenv("SERVICE_MAX_INFLIGHT", "64"))
+RETRY_AFTER_S = os.getenv("SERVICE_RETRY_AFTER_S", "1")
+
+
+# ========================================
+# Request bodies
+# ========================================
+class ParseRequest(BaseModel):
+    text: str
+    doc_type: str = "resume"
+    file_name: Optional[str] = None
+    mode: str = "auto"
+    backend: str = "groq"
+
+
+class MatchRequest(BaseModel):
+    parsed_resume: Dict[str, Any]
+    parsed_jd: Dict[str, Any]
+    resume_text: str = ""
+    jd_text: str = ""
+
+
+class TailorRequest(BaseModel):
+    parsed_resume: Dict[str, Any]
+    parsed_jd: Dict[str, Any]
+    approved_keywords: List[str] = []
+
+
+# ========================================
+# App + executors
+# ========================================
+class _Pools:
+    extract: ProcessPoolExecutor = None
+    compute: ThreadPoolExecutor = None
+    inflight: int = 0
+    rejected: int = 0
+
+
+pools = _Pools()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # spawn, not fork: the parent already runs httpx/executor threads and may hold torch
+    pools.extract = ProcessPoolExecutor(max_workers=EXTRACT_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    pools.compute = ThreadPoolExecutor(max_workers=LLM_THREADS, thread_name_prefix="pipeline")
+    logger.info(f"Service up: {EXTRACT_WORKERS} extract processes, {LLM_THREADS} LLM threads, max {MAX_INFLIGHT} in flight")
+    yield
+    pools.extract.shutdown(wait=False, cancel_futures=True)
+    pools.compute.shutdown(wait=False, cancel_futures=True)
+    llm.close()
+
+
+app = FastAPI(title="Resume Tailor AI", lifespan=lifespan)
+
+
+@app.middleware("http")
+async def backpressure(request: Request, call_next):
+    """Shed load with 429 once too many requests are in flight"""
+    if request.url.path == "/health":
+        return await call_next(request)
+
+    # Single event loop → no lock needed around the counter
+    if pools.inflight >= MAX_INFLIGHT:
+        pools.rejected += 1
+        return JSONResponse(
+            {"error": "Server busy, retry later"},
+            status_code=429,
+            headers={"Retry-After": RETRY_AFTER_S}
+        )
+
+    pools.inflight += 1
+    try:
+        return await call_next(request)
+    finally:
+        pools.inflight -= 1
+
+
+async def _run(executor, fn, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, lambda: fn(*args, **kwargs))
+
+
+def _tailor_isolated(parsed_resume: Dict[str, Any], parsed_jd: Dict[str, Any], approved_keywords: List[str]) -> Dict[str, Any]:
+    """tailor_summary_and_skills writes a .txt; give each request its own throwaway dir"""
+    with tempfile.TemporaryDirectory(prefix="tailor-") as out_dir:
+        result = tailor_summary_and_skills(parsed_resume, parsed_jd, approved_keywords, output_dir=out_dir)
+    result.pop("updated_file", None)   # server-side path, gone with the temp dir
+    return result
+
+
+# ========================================
+# Endpoints
+# ========================================
+@app.post("/extract")
+async def extract(file: UploadFile = File(...)):
+    suffix = Path(file.filename or "").suffix.lower()
+    if suffix not in SUPPORTED:
+        raise HTTPException(status_code=415, detail=f"Unsupported file type: {suffix or '(none)'}")
+
+    # Extraction runs in another process, so hand it a real file
+    fd, tmp_path = tempfile.mkstemp(suffix=suffix)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            shutil.copyfileobj(file.file, f)
+        loop = asyncio.get_running_loop()
+        text = await loop.run_in_executor(pools.extract, extract_text_from_file, tmp_path)
+    finally:
+        os.unlink(tmp_path)
+
+    return {"text": text, "chars": len(text)}
+
+
+@app.post("/parse")
+async def parse(req: ParseRequest):
+    result = await _run(pools.compute, parse_document, req.text, req.doc_type, req.file_name,
+                        mode=req.mode, backend=req.backend)
+    if "error" in result:
+        raise HTTPException(status_code=422, detail=result["error"])
+    return result
+
+
+@app.post("/match")
+async def match(req: MatchRequest):
+    return await _run(pools.compute, get_match_report, req.parsed_resume, req.parsed_jd,
+                      req.resume_text, req.jd_text)
+
+
+@app.post("/tailor")
+async def tailor(req: TailorRequest):
+    result = await _run(pools.compute, _tailor_isolated, req.parsed_resume, req.parsed_jd,
+                        req.approved_keywords)
+    if "error" in result:
+        raise HTTPException(status_code=502, detail=result["error"])
+    return result
+
+
+@app.get("/health")
+async def health():
+    return {
+        "status": "ok",
+        "inflight": pools.inflight,
+        "max_inflight": MAX_INFLIGHT,
+        "rejected": pools.rejected,
+        "llm": llm.metrics(),
+        "parse_calls_saved": groq_flight.saved_calls
+    }
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app, host=os.getenv("HOST", "0.0.0.0"), port=int(os.getenv("PORT", "8000")))
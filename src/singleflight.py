@@ -0,0 +1,111 @@
+# src/singleflight.py
+"""
+In-flight request coalescing ("single flight").
+
+Identical calls (same key) that arrive while one is still running wait for
+that call and share its result instead of issuing their own. Works for
+threaded callers (do) and asyncio callers (do_async); both share the same
+in-flight table, so an async caller can join a threaded call and vice versa.
+"""
+
+import asyncio
+import hashlib
+import logging
+import threading
+from concurrent.futures import Future, InvalidStateError
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+logger = logging.getLogger("singleflight")
+
+
+def make_key(*parts: Any) -> str:
+    """Stable key for a call (e.g. model + prompt + sampling params)"""
+    payload = "\x1f".join(str(p) for p in parts)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    def __init__(self):
+        self._inflight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self._tasks: set = set()   # running async leader calls (keeps them referenced)
+        self.stats = {"calls": 0, "executed": 0, "shared": 0}
+
+    def _join_or_lead(self, key: Hashable):
+        """Returns (future, is_leader)"""
+        with self._lock:
+            self.stats["calls"] += 1
+            future = self._inflight.get(key)
+            if future is not None:
+                self.stats["shared"] += 1
+                return future, False
+            future = Future()
+            self._inflight[key] = future
+            self.stats["executed"] += 1
+            return future, True
+
+    def _finish(self, key: Hashable, future: Future) -> None:
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    @staticmethod
+    def _settle(future: Future, result: Any = None, error: BaseException = None) -> None:
+        """Resolve the shared future unless something already did"""
+        if future.done():
+            return
+        try:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+        except InvalidStateError:
+            pass   # lost a race with a concurrent settle/cancel
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Run fn() once for all concurrent threaded callers with this key"""
+        future, leader = self._join_or_lead(key)
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            self._settle(future, error=e)
+            raise
+        else:
+            self._settle(future, result)
+            return result
+        finally:
+            self._finish(key, future)
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Await fn() once for all concurrent callers (async or threaded) with this key"""
+        future, leader = self._join_or_lead(key)
+        if not leader:
+            # shield: a follower giving up (wait_for timeout, cancelled task)
+            # must not cancel the call the leader and other waiters share
+            return await asyncio.shield(asyncio.wrap_future(future))
+
+        # The call runs in its own task: cancelling the leader (client gone,
+        # wait_for timeout) must not fail the followers sharing it
+        task = asyncio.ensure_future(self._lead_async(key, future, fn))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return await asyncio.shield(task)
+
+    async def _lead_async(self, key: Hashable, future: Future, fn: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            result = await fn()
+        except BaseException as e:
+            self._settle(future, error=e)
+            raise
+        else:
+            self._settle(future, result)
+            return result
+        finally:
+            self._finish(key, future)
+
+    @property
+    def saved_calls(self) -> int:
+        return self.stats["shared"]
@@ -0,0 +1,114 @@
+# src/speculation.py
+"""
+Speculative background tailoring.
+
+As soon as the analyze step knows the suggested keywords, the tailoring LLM
+call is started in the background. When the user clicks "Generate", the
+result for the exact same keyword set is returned (or awaited) instead of
+starting a fresh call. Speculations for any other keyword set are cancelled
+if they have not started yet and discarded otherwise.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from tailor_llm import tailor_summary_and_skills
+
+logger = logging.getLogger("speculation")
+logging.basicConfig(level=logging.INFO)
+
+# One slot per expected concurrent session, so a user's speculation is
+# rarely queued behind other users'
+MAX_WORKERS = int(os.getenv("SPECULATION_WORKERS", "16"))
+MAX_SPECULATIONS = 64   # oldest speculations are dropped beyond this
+
+
+def _docs_key(parsed_resume: Dict[str, Any], parsed_jd: Dict[str, Any]) -> str:
+    payload = json.dumps([parsed_resume, parsed_jd], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _keywords_key(keywords: List[str]) -> FrozenSet[str]:
+    # Same normalization tailor_summary_and_skills applies
+    return frozenset(k.strip().lower() for k in keywords or [] if k.strip())
+
+
+class SpeculativeTailor:
+    def __init__(self, max_workers: int = MAX_WORKERS, max_speculations: int = MAX_SPECULATIONS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="speculate")
+        self._jobs: "OrderedDict[Tuple[str, FrozenSet[str]], Future]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.max_speculations = max_speculations
+        self.stats = {"started": 0, "hits": 0, "misses": 0, "cancelled": 0, "discarded": 0}
+
+    def _drop(self, key) -> None:
+        """Cancel a job if still queued, otherwise let it finish and forget it"""
+        future = self._jobs.pop(key)
+        if future.cancel():
+            self.stats["cancelled"] += 1
+        else:
+            self.stats["discarded"] += 1
+
+    def speculate(self, parsed_resume: Dict[str, Any], parsed_jd: Dict[str, Any], keywords: List[str]) -> None:
+        """Start tailoring in the background for the most likely keyword selection"""
+        docs = _docs_key(parsed_resume, parsed_jd)
+        key = (docs, _keywords_key(keywords))
+
+        with self._lock:
+            if key in self._jobs:
+                return
+            # A newer analysis of the same documents replaces older guesses
+            for stale in [k for k in self._jobs if k[0] == docs]:
+                self._drop(stale)
+            while len(self._jobs) >= self.max_speculations:
+                self._drop(next(iter(self._jobs)))
+
+            self._jobs[key] = self._executor.submit(
+                tailor_summary_and_skills,
+                parsed_resume=parsed_resume,
+                parsed_jd=parsed_jd,
+                approved_keywords=list(keywords)
+            )
+            self.stats["started"] += 1
+        logger.info(f"Speculative tailoring started ({len(key[1])} keywords)")
+
+    def take(self, parsed_resume: Dict[str, Any], parsed_jd: Dict[str, Any], keywords: List[str]) -> Optional[Dict[str, Any]]:
+        """
+        Result of the speculation for exactly these keywords, or None
+        (also when that speculation has not started running yet).
+        Any speculation for the same documents with a different selection is dropped.
+        """
+        docs = _docs_key(parsed_resume, parsed_jd)
+        key = (docs, _keywords_key(keywords))
+
+        with self._lock:
+            future = self._jobs.pop(key, None)
+            for stale in [k for k in self._jobs if k[0] == docs]:
+                self._drop(stale)
+            if future is None:
+                self.stats["misses"] += 1
+                return None
+            if future.cancel():
+                # Still queued behind other sessions: tailoring now is faster
+                self.stats["cancelled"] += 1
+                self.stats["misses"] += 1
+                return None
+            self.stats["hits"] += 1
+
+        try:
+            result = future.result()
+        except Exception as e:
+            logger.warning(f"Speculative tailoring failed: {e}")
+            return None
+
+        # Failed speculations are retried for real by the caller
+        return None if "error" in result else result
+
+
+speculator = SpeculativeTailor()
@@ -0,0 +1,251 @@
+# src/suggestions.py
+"""
+Rule-based skill suggestions for the analyze step.
+
+Rules live in resources/suggestion_rules.json:
+    [{"keywords": ["pytorch", "keras"], "suggest": ["deep learning"]}, ...]
+
+All rule keywords are compiled once into an Aho-Corasick automaton, so every
+matching rule is found in a single linear pass over the resume text,
+no matter how many rules are loaded.
+"""
+
+import json
+import logging
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger("suggestions")
+logging.basicConfig(level=logging.INFO)
+
+RULES_PATH = Path(__file__).parent / "resources" / "suggestion_rules.json"
+
+
+# ========================================
+# 1. AHO-CORASICK AUTOMATON
+# ========================================
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+def _suffix_end(text: str, i: int) -> int:
+    """
+    End of the allowed suffix after a keyword ending at i: a version
+    number ("python3", "python3.11", "tensorflow2") or a plural "s".
+    """
+    n = len(text)
+    j = i + 1
+    if j < n and text[j].isdigit():
+        while j < n and (text[j].isdigit() or (text[j] == "." and j + 1 < n and text[j + 1].isdigit())):
+            j += 1
+    elif j < n and text[j] == "s":
+        j += 1
+    return j
+
+
+class KeywordAutomaton:
+    """Multi-pattern matcher: keyword -> list of rule ids"""
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]   # pattern ids ending at each state
+        self._patterns: List[str] = []
+        self._pattern_rules: List[List[int]] = []
+        self._index: Dict[str, int] = {}
+        self._built = False
+
+    def add(self, keyword: str, rule_id: int) -> None:
+        keyword = keyword.strip().lower()
+        if not keyword:
+            return
+        if keyword in self._index:
+            self._pattern_rules[self._index[keyword]].append(rule_id)
+            return
+
+        state = 0
+        for ch in keyword:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+                self._goto[state][ch] = nxt
+            state = nxt
+
+        pid = len(self._patterns)
+        self._patterns.append(keyword)
+        self._pattern_rules.append([rule_id])
+        self._index[keyword] = pid
+        self._out[state].append(pid)
+        self._built = False
+
+    def build(self) -> None:
+        """Compute failure links (BFS) and merge outputs along them"""
+        queue = deque()
+        for nxt in self._goto[0].values():
+            self._fail[nxt] = 0
+            queue.append(nxt)
+
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+        self._built = True
+
+    def find_rules(self, text: str) -> List[int]:
+        """
+        Ids of every rule with at least one keyword matching on word
+        boundaries; a version number or plural "s" may follow the keyword
+        """
+        if not self._built:
+            self.build()
+
+        text = text.lower()
+        n = len(text)
+        goto, fail, out = self._goto, self._fail, self._out
+        hits = set()
+        state = 0
+
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if not out[state]:
+                continue
+
+            for pid in out[state]:
+                keyword = self._patterns[pid]
+                start = i - len(keyword) + 1
+                # Word boundaries (only where the keyword itself starts/ends on a word char)
+                if _is_word_char(keyword[0]) and start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                if _is_word_char(keyword[-1]):
+                    end = _suffix_end(text, i)
+                    if end < n and _is_word_char(text[end]):
+                        continue
+                hits.update(self._pattern_rules[pid])
+
+        return sorted(hits)
+
+    def __len__(self) -> int:
+        return len(self._patterns)
+
+
+# ========================================
+# 2. SUGGESTION ENGINE
+# ========================================
+class SuggestionEngine:
+    def __init__(self, rules: List[Dict[str, List[str]]]):
+        self.rules = rules
+        self.automaton = KeywordAutomaton()
+        for rule_id, rule in enumerate(rules):
+            for keyword in rule.get("keywords", []):
+                self.automaton.add(keyword, rule_id)
+        self.automaton.build()
+        logger.info(f"Compiled {len(rules)} suggestion rules ({len(self.automaton)} keywords)")
+
+    @classmethod
+    def from_file(cls, path: Path = RULES_PATH) -> "SuggestionEngine":
+        rules = json.loads(Path(path).read_text(encoding="utf-8"))
+        return cls(rules)
+
+    def suggest(self, text: str) -> List[str]:
+        """Suggestions of every matching rule, in rule order, deduplicated, Title Case"""
+        if not text:
+            return []
+        suggestions = []
+        for rule_id in self.automaton.find_rules(text):
+            suggestions.extend(self.rules[rule_id].get("suggest", []))
+        return list(dict.fromkeys(s.title() for s in suggestions))
+
+
+_engine: Optional[SuggestionEngine] = None
+
+
+def get_engine() -> SuggestionEngine:
+    """Shared engine, compiled on first use"""
+    global _engine
+    if _engine is None:
+        _engine = SuggestionEngine.from_file()
+    return _engine
+
+
+def suggest_skills(text: str) -> List[str]:
+    return get_engine().suggest(text)
+
+
+# ========================================
+# 3. BENCHMARK
+# ========================================
+def benchmark(num_rules: int = 10_000, text_words: int = 1_500, repeat: int = 5) -> Dict[str, float]:
+    """Compare the automaton against per-rule substring scans on synthetic rules"""
+    import random
+    import string
+    import time
+
+    rng = random.Random(42)
+
+    def word():
+        return "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10)))
+
+    rules = [
+        {"keywords": [word() for _ in range(3)], "suggest": [f"skill {i}"]}
+        for i in range(num_rules)
+    ]
+    vocab = [k for r in rules[:50] for k in r["keywords"]] + [word() for _ in range(2_000)]
+    text = " ".join(rng.choice(vocab) for _ in range(text_words))
+
+    t0 = time.perf_counter()
+    engine = SuggestionEngine(rules)
+    compile_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        engine.suggest(text)
+    automaton_s = (time.perf_counter() - t0) / repeat
+
+    lower_text = text.lower()
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        [r["suggest"] for r in rules if any(k in lower_text for k in r["keywords"])]
+    naive_s = (time.perf_counter() - t0) / repeat
+
+    return {
+        "rules": num_rules,
+        "text_chars": len(text),
+        "compile_ms": round(compile_s * 1000, 2),
+        "automaton_ms": round(automaton_s * 1000, 3),
+        "substring_scan_ms": round(naive_s * 1000, 3),
+        "speedup": round(naive_s / automaton_s, 1) if automaton_s else 0.0,
+    }
+
+
+# ========================================
+# CLI
+# ========================================
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Skill suggestions from resume text")
+    parser.add_argument("file", nargs="?", help="Resume file to suggest skills for")
+    parser.add_argument("--bench", type=int, nargs="*", metavar="N",
+                        help="Benchmark with N synthetic rules (default: 1000 10000 100000)")
+    args = parser.parse_args()
+
+    if args.bench is not None:
+        for n in args.bench or [1_000, 10_000, 100_000]:
+            print(json.dumps(benchmark(n)))
+    elif args.file:
+        from extractor import extract_text_from_file
+        print("\n".join(suggest_skills(extract_text_from_file(args.file))) or "(no suggestions)")
+    else:
+        parser.print_help()
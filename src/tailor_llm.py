@@ -4,12 +4,10 @@ import logging
 import argparse
 from pathlib import Path
 from typing import Dict, Any, List
-from groq import Groq
-from dotenv import load_dotenv
+from llm import chat_completion  # shared Groq call layer (loads .env)
+from profiling import profile_stage
 import re
 
-load_dotenv()
-client = Groq()
 logger = logging.getLogger("tailor")
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 
@@ -66,13 +64,8 @@ Return ONLY valid JSON.
 """
 
     try:
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.4,
-            max_tokens=800
-        )
-        raw = response.choices[0].message.content.strip()
+        with profile_stage("tailor.llm"):
+            raw = chat_completion(prompt, model="llama-3.3-70b-versatile", temperature=0.4, max_tokens=800)
         json_match = re.search(r"\{.*\}", raw, re.DOTALL)
         if not json_match:
             raise ValueError("No JSON found")
@@ -115,9 +108,15 @@ def main():
     parser.add_argument("-k", "--keywords", nargs="+", default=[],
                         help="Approved keywords (e.g. 'computer vision' 'image processing')")
     parser.add_argument("-o", "--output", default="output", help="Output folder")
+    parser.add_argument("--profile", nargs="?", const="output/memory_profile.json", metavar="JSON",
+                        help="Profile memory per stage (tracemalloc) and write a JSON report")
 
     args = parser.parse_args()
 
+    import profiling
+    if args.profile:
+        profiling.enable(args.profile)
+
     from extractor import extract_text_from_file
     from parser import parse_document
 
@@ -141,6 +140,10 @@ def main():
     else:
         print("Error:", result["error"])
 
+    if args.profile:
+        profiling.get_profiler().print_summary()
+        print(f"\nMemory profile saved to {profiling.dump_if_enabled()}")
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
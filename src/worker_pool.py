@@ -0,0 +1,355 @@
+# src/worker_pool.py
+"""
+Long-lived, prewarmed worker pool for the extract → parse → match pipeline.
+
+Each worker imports extractor / parser / matcher once in its initializer
+(KeyBERT + torch, Groq client), then serves many tasks. A worker retires
+itself after MAX_TASKS tasks or once its RSS passes a ceiling, and the pool
+starts a fresh, prewarmed replacement. Per-worker utilization is reported
+by WorkerPool.stats().
+"""
+
+import itertools
+import logging
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+from profiling import rss_mb as _rss_mb
+
+logger = logging.getLogger("worker_pool")
+logging.basicConfig(level=logging.INFO)
+
+DEFAULT_MAX_TASKS = 500      # recycle a worker after this many tasks (0 = never)
+DEFAULT_MAX_RSS_MB = 3072    # ...or once its RSS exceeds this (0 = never)
+MAX_LOAD_FAILURES = 3        # consecutive workers dying during model load → pool is broken
+REAP_INTERVAL_S = 1.0        # how often the collector checks for crashed workers
+
+
+# ========================================
+# 1. WORKER SIDE
+# ========================================
+_TASKS: Dict[str, Callable[..., Any]] = {}
+
+
+def _init_models() -> None:
+    """Load every model once per worker and register the task functions"""
+    from extractor import extract_text_from_file
+    from parser import parse_document
+    from matcher import get_match_report
+
+    def pipeline(resume_path: str, jd_path: str) -> Dict[str, Any]:
+        resume_text = extract_text_from_file(resume_path)
+        jd_text = extract_text_from_file(jd_path)
+        parsed_resume = parse_document(resume_text, "resume", file_name=resume_path)
+        parsed_jd = parse_document(jd_text, "jd")
+        return {
+            "parsed_resume": parsed_resume,
+            "parsed_jd": parsed_jd,
+            "report": get_match_report(parsed_resume, parsed_jd, resume_text, jd_text)
+        }
+
+    _TASKS.update({
+        "extract": extract_text_from_file,
+        "parse": parse_document,
+        "match": get_match_report,
+        "pipeline": pipeline,
+    })
+
+
+def _worker_main(worker_id: int, tasks: mp.Queue, results: mp.Queue, max_tasks: int, max_rss_mb: float) -> None:
+    started = time.perf_counter()
+    _init_models()
+    load_s = time.perf_counter() - started
+    results.put(("ready", worker_id, os.getpid(), load_s, _rss_mb()))
+
+    done, busy_s = 0, 0.0
+    while True:
+        item = tasks.get()
+        if item is None:
+            break
+        task_id, name, args, kwargs = item
+        results.put(("start", worker_id, task_id))
+
+        t0 = time.perf_counter()
+        try:
+            value, ok = _TASKS[name](*args, **kwargs), True
+        except Exception as e:
+            value, ok = f"{type(e).__name__}: {e}", False
+        elapsed = time.perf_counter() - t0
+        done += 1
+        busy_s += elapsed
+        rss = _rss_mb()
+        results.put(("result", worker_id, task_id, ok, value, elapsed, rss))
+
+        if max_tasks and done >= max_tasks:
+            results.put(("retire", worker_id, f"{done} tasks"))
+            break
+        if max_rss_mb and rss > max_rss_mb:
+            results.put(("retire", worker_id, f"RSS {rss:.0f} MB > {max_rss_mb} MB"))
+            break
+
+
+# ========================================
+# 2. POOL (PARENT SIDE)
+# ========================================
+class WorkerPool:
+    def __init__(
+        self,
+        processes: Optional[int] = None,
+        max_tasks_per_worker: int = DEFAULT_MAX_TASKS,
+        max_rss_mb: float = DEFAULT_MAX_RSS_MB,
+        wait_ready: bool = True
+    ):
+        self._ctx = mp.get_context("spawn")   # clean interpreter per worker (torch is not fork-safe)
+        self._tasks = self._ctx.Queue()
+        self._results = self._ctx.Queue()
+        self.processes = processes or os.cpu_count() or 1
+        self.max_tasks = max_tasks_per_worker
+        self.max_rss_mb = max_rss_mb
+
+        self._ids = itertools.count()
+        self._task_ids = itertools.count()
+        self._futures: Dict[int, Future] = {}
+        self._running: Dict[int, int] = {}          # worker id -> task id
+        self._workers: Dict[int, mp.Process] = {}
+        self._stats: Dict[int, Dict[str, Any]] = {}
+        self._retired: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._ready = threading.Semaphore(0)
+        self._closed = False
+        self._load_failures = 0
+        self._broken: Optional[str] = None
+
+        for _ in range(self.processes):
+            self._spawn()
+
+        self._collector = threading.Thread(target=self._collect, name="worker-pool-collector", daemon=True)
+        self._collector.start()
+
+        if wait_ready:
+            for _ in range(self.processes):
+                self._ready.acquire()
+            if self._broken:
+                raise RuntimeError(self._broken)
+            logger.info(f"Worker pool ready: {self.processes} prewarmed workers")
+
+    # ---------- lifecycle ----------
+    def _spawn(self) -> None:
+        wid = next(self._ids)
+        proc = self._ctx.Process(
+            target=_worker_main,
+            args=(wid, self._tasks, self._results, self.max_tasks, self.max_rss_mb),
+            name=f"pipeline-worker-{wid}",
+            daemon=True
+        )
+        with self._lock:
+            self._workers[wid] = proc
+            self._stats[wid] = {
+                "worker_id": wid, "pid": None, "state": "loading", "tasks": 0, "errors": 0,
+                "busy_s": 0.0, "load_s": None, "rss_mb": None, "started": time.time()
+            }
+        proc.start()
+
+    def _retire(self, wid: int, reason: str, crashed: bool = False) -> None:
+        with self._lock:
+            proc = self._workers.pop(wid, None)
+            if proc is None:
+                return   # already reaped/retired (e.g. exit seen before its "retire" message)
+            stats = self._stats.pop(wid, None)
+            task_id = self._running.pop(wid, None)
+        proc.join(timeout=5)
+        died_loading = stats is not None and stats["state"] == "loading"
+        if stats is not None:
+            stats.update(state="retired", reason=reason, uptime_s=round(time.time() - stats["started"], 1))
+            self._retired.append(stats)
+        if crashed and task_id is not None:
+            # Clean exits always report their last result first; only a crash loses it
+            with self._lock:
+                future = self._futures.pop(task_id, None)
+            if future is not None:
+                future.set_exception(RuntimeError(f"Worker {wid} died while running task {task_id}"))
+
+        logger.info(f"Worker {wid} retired ({reason})")
+        if died_loading:
+            self._load_failures += 1
+            if self._load_failures >= MAX_LOAD_FAILURES:
+                self._fail(f"Workers keep dying while loading models ({reason})")
+                return
+        if not self._closed:
+            self._spawn()
+
+    def _fail(self, reason: str) -> None:
+        """Stop respawning, fail every pending task and unblock the constructor"""
+        logger.error(reason)
+        self._broken = reason
+        self._closed = True
+        with self._lock:
+            futures, self._futures = list(self._futures.values()), {}
+        for future in futures:
+            future.set_exception(RuntimeError(reason))
+        for _ in range(self.processes):
+            self._ready.release()
+
+    def _collect(self) -> None:
+        last_reap = time.monotonic()
+        while True:
+            # Reap on a timer: under load the queue never runs empty
+            if time.monotonic() - last_reap >= REAP_INTERVAL_S:
+                self._reap_dead()
+                last_reap = time.monotonic()
+            try:
+                msg = self._results.get(timeout=REAP_INTERVAL_S)
+            except queue.Empty:
+                if self._closed and not self._workers:
+                    return
+                continue
+
+            self._handle(msg)
+
+    def _handle(self, msg) -> None:
+        kind, wid = msg[0], msg[1]
+        if kind == "ready":
+            _, _, pid, load_s, rss = msg
+            with self._lock:
+                if wid in self._stats:
+                    self._stats[wid].update(state="idle", pid=pid, load_s=round(load_s, 2), rss_mb=round(rss, 1))
+            self._load_failures = 0
+            self._ready.release()
+        elif kind == "start":
+            with self._lock:
+                self._running[wid] = msg[2]
+                if wid in self._stats:
+                    self._stats[wid]["state"] = "busy"
+        elif kind == "result":
+            _, _, task_id, ok, value, elapsed, rss = msg
+            with self._lock:
+                self._running.pop(wid, None)
+                stats = self._stats.get(wid)
+                if stats is not None:
+                    stats["tasks"] += 1
+                    stats["errors"] += 0 if ok else 1
+                    stats["busy_s"] += elapsed
+                    stats.update(state="idle", rss_mb=round(rss, 1))
+                future = self._futures.pop(task_id, None)
+            if future is not None:
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(RuntimeError(value))
+        elif kind == "retire":
+            self._retire(wid, msg[2])
+
+    def _drain(self) -> None:
+        """Handle every message already queued (results a dead worker sent before exiting)"""
+        # Time-bounded: live workers keep the queue busy, but a dead worker's
+        # messages were queued before we saw its exit, so they come first
+        deadline = time.monotonic() + REAP_INTERVAL_S
+        while time.monotonic() < deadline:
+            try:
+                msg = self._results.get_nowait()
+            except queue.Empty:
+                return
+            self._handle(msg)
+
+    def _reap_dead(self) -> None:
+        """Replace workers that crashed (OOM killer, segfault, ...)"""
+        with self._lock:
+            exited = any(p.exitcode is not None for p in self._workers.values())
+        if not exited:
+            return
+        # A worker recycled after its last task may exit before we read that
+        # task's result (and its "retire"); settle those before judging it
+        self._drain()
+        with self._lock:
+            dead = [(wid, p.exitcode) for wid, p in self._workers.items() if p.exitcode is not None]
+        for wid, exitcode in dead:
+            self._retire(wid, f"exit code {exitcode}", crashed=exitcode != 0)
+
+    # ---------- public API ----------
+    def submit(self, task: str, *args, **kwargs) -> Future:
+        """task: 'extract' | 'parse' | 'match' | 'pipeline'"""
+        if self._closed:
+            raise RuntimeError(self._broken or "Worker pool is shut down")
+        task_id = next(self._task_ids)
+        future = Future()
+        with self._lock:
+            self._futures[task_id] = future
+        self._tasks.put((task_id, task, args, kwargs))
+        return future
+
+    def map(self, task: str, items, **kwargs) -> List[Any]:
+        """Run task(item, **kwargs) for every item; results in input order"""
+        futures = [self.submit(task, *(item if isinstance(item, tuple) else (item,)), **kwargs) for item in items]
+        return [f.result() for f in futures]
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            workers = []
+            for s in self._stats.values():
+                uptime = now - s["started"]
+                serving = max(uptime - (s["load_s"] or uptime), 1e-9)
+                workers.append({
+                    **s,
+                    "busy_s": round(s["busy_s"], 2),
+                    "uptime_s": round(uptime, 1),
+                    "utilization": round(min(s["busy_s"] / serving, 1.0), 3) if s["load_s"] is not None else 0.0
+                })
+            return {
+                "workers": workers,
+                "retired": len(self._retired),
+                "pending_tasks": len(self._futures),
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._closed = True
+        with self._lock:
+            procs = list(self._workers.values())
+        for _ in procs:
+            self._tasks.put(None)
+        if wait:
+            for p in procs:
+                p.join(timeout=30)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+
+# ========================================
+# CLI
+# ========================================
+if __name__ == "__main__":
+    import argparse
+    import json
+    from pathlib import Path
+
+    parser = argparse.ArgumentParser(description="Match a directory of resumes against one JD on a prewarmed pool")
+    parser.add_argument("resumes", help="Directory of resumes")
+    parser.add_argument("jd", help="Job description file")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--max-tasks", type=int, default=DEFAULT_MAX_TASKS)
+    parser.add_argument("--max-rss-mb", type=float, default=DEFAULT_MAX_RSS_MB)
+    args = parser.parse_args()
+
+    paths = sorted(str(p) for p in Path(args.resumes).iterdir() if p.suffix.lower() in {".pdf", ".docx", ".txt", ".md"})
+
+    with WorkerPool(args.workers, args.max_tasks, args.max_rss_mb) as pool:
+        t0 = time.perf_counter()
+        futures = {path: pool.submit("pipeline", path, args.jd) for path in paths}
+        for path, future in futures.items():
+            try:
+                report = future.result()["report"]
+                print(f"{report['match_score']:5.1f}%  {path}")
+            except Exception as e:
+                print(f"  ERR   {path}: {e}")
+        elapsed = time.perf_counter() - t0
+        print(f"\n{len(paths)} resumes in {elapsed:.1f}s")
+        print(json.dumps(pool.stats(), indent=2))
@@ -0,0 +1,73 @@
+# tests/test_profiling.py
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import profiling  # noqa: E402
+
+NOISE_BYTES = 64 * 1024   # stage bookkeeping (frame dict, report entries)
+
+
+def _stages(profiler, name):
+    return [s for s in profiler.stages if s["stage"] == name]
+
+
+def test_noop_stage_reports_about_zero_bytes():
+    profiler = profiling.MemoryProfiler()
+    live = [object() for _ in range(100_000)]   # big heap → big snapshots
+    with profiler.stage("noop"):
+        pass
+    (stage,) = _stages(profiler, "noop")
+    assert stage["peak_bytes"] < NOISE_BYTES
+    assert stage["retained_bytes"] < NOISE_BYTES
+    del live
+
+
+def test_nested_noop_stage_does_not_inflate_parent():
+    profiler = profiling.MemoryProfiler()
+    live = [object() for _ in range(100_000)]
+    with profiler.stage("outer"):
+        with profiler.stage("inner"):
+            pass
+    (outer,) = _stages(profiler, "outer")
+    assert outer["peak_bytes"] < NOISE_BYTES
+    del live
+
+
+def test_child_peak_is_passed_to_parent():
+    profiler = profiling.MemoryProfiler()
+    with profiler.stage("outer"):
+        with profiler.stage("inner"):
+            buf = bytearray(4_000_000)
+            del buf
+    (inner,) = _stages(profiler, "inner")
+    (outer,) = _stages(profiler, "outer")
+    assert 4_000_000 <= inner["peak_bytes"] < 4_000_000 + NOISE_BYTES
+    assert 4_000_000 <= outer["peak_bytes"] < 4_000_000 + NOISE_BYTES
+
+
+def test_stage_on_another_thread_does_not_reset_owner_peak():
+    import threading
+
+    profiler = profiling.MemoryProfiler()
+    started, release = threading.Event(), threading.Event()
+
+    def other_thread():
+        started.wait()
+        with profiler.stage("other"):
+            release.set()
+
+    t = threading.Thread(target=other_thread)
+    t.start()
+    with profiler.stage("owner"):
+        buf = bytearray(4_000_000)
+        del buf
+        started.set()
+        release.wait(5)
+    t.join()
+
+    (owner,) = _stages(profiler, "owner")
+    assert owner["peak_bytes"] >= 4_000_000
+    assert not _stages(profiler, "other")
+    assert profiler.skipped_concurrent == 1
@@ -0,0 +1,83 @@
+# tests/test_singleflight.py
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from singleflight import SingleFlight  # noqa: E402
+
+
+def test_threaded_callers_share_one_call():
+    flight = SingleFlight()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.2)
+        return 42
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("k", slow))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == [42] * 5
+    assert len(calls) == 1
+    assert flight.saved_calls == 4
+
+
+def test_follower_timeout_does_not_cancel_shared_call():
+    flight = SingleFlight()
+
+    async def slow():
+        await asyncio.sleep(0.2)
+        return 42
+
+    async def main():
+        leader = asyncio.ensure_future(flight.do_async("k", slow))
+        await asyncio.sleep(0.01)
+        try:
+            await asyncio.wait_for(flight.do_async("k", slow), 0.05)
+        except asyncio.TimeoutError:
+            pass
+        other = asyncio.ensure_future(flight.do_async("k", slow))
+        return await leader, await other
+
+    assert asyncio.run(main()) == (42, 42)
+
+
+def test_leader_cancellation_does_not_fail_followers():
+    flight = SingleFlight()
+    calls = []
+
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(0.3)
+        return 42
+
+    thread_result = []
+
+    async def main():
+        leader = asyncio.ensure_future(flight.do_async("k", slow))
+        await asyncio.sleep(0.01)
+        follower = asyncio.ensure_future(flight.do_async("k", slow))
+        thread = threading.Thread(target=lambda: thread_result.append(flight.do("k", lambda: -1)))
+        thread.start()
+        await asyncio.sleep(0.05)
+
+        leader.cancel()
+        try:
+            await leader
+        except asyncio.CancelledError:
+            pass
+        result = await follower
+        await asyncio.to_thread(thread.join)
+        return result
+
+    assert asyncio.run(main()) == 42
+    assert thread_result == [42]
+    assert len(calls) == 1